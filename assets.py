@@ -0,0 +1,134 @@
+"""Loading of sprites, fonts and sounds, with a disk cache of decoded images.
+
+An animation's frames are packed into a single atlas the first time they are
+loaded, and the atlas is written to cache_dir as raw RGBA pixels, along with
+the frame rectangles and the mtimes of the source files. Later runs read that
+one file instead of decoding every PNG, until a source file is changed, added
+or removed. Fonts come from the font file bundled with pygame, which avoids
+a system font scan. Sounds load on a background thread and each one plays
+only once it is ready.
+"""
+import glob
+import json
+import math
+import os
+import re
+import threading
+
+import pygame
+
+cache_dir = ".asset_cache"
+
+sound_files = {
+    "shoot": "sounds/guns/shoot.wav",
+    "hurt": "sounds/player/hurt.wav",
+    "powerup": "sounds/player/powerup.wav",
+    "hit": "sounds/zombies/zombie-hit-7.wav",
+}
+
+
+# Sprites
+
+def frame_number(path):
+    """Return the number at the end of a frame's file name"""
+    return int(re.search(r"(\d+)\D*$", path).group(1))
+
+
+def pack_atlas(paths, columns):
+    """Blit images onto a grid on one surface; returns (atlas, [(x, y, width, height)])"""
+    images = [pygame.image.load(path) for path in paths]
+    cell_width = max(image.get_width() for image in images)
+    cell_height = max(image.get_height() for image in images)
+    columns = min(columns, len(images))
+    rows = math.ceil(len(images) / columns)
+
+    atlas = pygame.Surface((cell_width * columns, cell_height * rows), pygame.SRCALPHA)
+    rects = []
+    for i, image in enumerate(images):
+        x = i % columns * cell_width
+        y = i // columns * cell_height
+        atlas.blit(image, (x, y))
+        rects.append((x, y, image.get_width(), image.get_height()))
+    return atlas, rects
+
+
+def load_animation(pattern, name, columns=6):
+    """Return the frames matching a glob pattern, in numeric order, as subsurfaces of one atlas"""
+    paths = sorted(glob.glob(pattern), key=frame_number)
+    if not paths:
+        print(f"No sprites match {pattern}")
+        return []
+    sources = {path: os.path.getmtime(path) for path in paths}
+    pixels_path = os.path.join(cache_dir, f"{name}.rgba")
+    index_path = os.path.join(cache_dir, f"{name}.json")
+
+    atlas = None
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+        if index["sources"] == sources:
+            with open(pixels_path, "rb") as f:
+                atlas = pygame.image.frombytes(f.read(), index["size"], "RGBA")
+            rects = index["rects"]
+    except (OSError, ValueError, KeyError):
+        atlas = None
+
+    if atlas is None:
+        atlas, rects = pack_atlas(paths, columns)
+        try:
+            save_atlas(atlas, rects, sources, pixels_path, index_path)
+        except OSError as e:
+            print(f"Could not cache the {name} atlas: {e}")
+
+    # convert_alpha needs a display
+    if pygame.display.get_surface() is not None:
+        atlas = atlas.convert_alpha()
+    return [atlas.subsurface(rect) for rect in rects]
+
+
+def save_atlas(atlas, rects, sources, pixels_path, index_path):
+    """Write an atlas's pixels and then its index, so a half-written cache is never used"""
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(pixels_path + ".tmp", "wb") as f:
+        f.write(pygame.image.tobytes(atlas, "RGBA"))
+    os.replace(pixels_path + ".tmp", pixels_path)
+    with open(index_path + ".tmp", "w") as f:
+        json.dump({"size": atlas.get_size(), "rects": rects, "sources": sources}, f)
+    os.replace(index_path + ".tmp", index_path)
+
+
+# Fonts
+
+def font(size):
+    """Return the font bundled with pygame at a size"""
+    return pygame.font.Font(None, size)
+
+
+# Sounds
+
+class SoundBank:
+    """Sounds loaded on a background thread; play() skips any not loaded yet"""
+
+    def __init__(self, files):
+        self.files = files  # name -> path
+        self.loaded = {}  # name -> pygame.mixer.Sound
+        self.thread = None
+
+    def start(self):
+        """Start loading in the background (needs pygame.mixer to be initialized)"""
+        self.thread = threading.Thread(target=self.load, name="sound-loader", daemon=True)
+        self.thread.start()
+
+    def load(self):
+        """Load every sound"""
+        for name, path in self.files.items():
+            try:
+                self.loaded[name] = pygame.mixer.Sound(path)
+            except (pygame.error, FileNotFoundError):
+                print(f"Failed to load sound {path}")
+
+    def play(self, name):
+        """Play a sound, if it has loaded"""
+        sound = self.loaded.get(name)
+        if sound is not None:
+            sound.play()
@@ -0,0 +1,286 @@
+"""Stress-test the game in scripted scenarios and report per-phase frame times.
+
+Each scenario sets up a game, then runs it for a number of ticks, drawing
+every tick into an offscreen window unless --no-render is given. The time
+of each phase of each tick (input, spawn, zombie update, collision, ...)
+is recorded, and the p50/p95/p99 of the frame and of every phase are
+written to a JSON file. Given --baseline, the results are compared against
+an earlier file and the exit status is 1 if anything got slower than the
+tolerance allows.
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json
+    python benchmark.py zombies_2000 shotgun --ticks 300 --no-render
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import platform
+import sys
+
+import entity_arrays
+from game import Game, Inputs, generate_map, starting_ammo, zombie_types, zombies_in_wave
+from quality import quality_tiers
+from timing import PhaseTimer, percentile
+
+percentiles = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+# Run settings that must match for two results files to be compared, with
+# their values in files written before the setting was recorded
+comparable_meta = {"numpy": False, "render": True, "quality": 0, "seed": 0}
+
+
+# Scenario setup and per-tick hooks
+
+def add_zombies(game, count, min_distance=100, max_distance=800):
+    """Scatter zombies of every type around the player"""
+    rng = game.rng
+    names = list(zombie_types)
+    for _ in range(count):
+        ztype = rng.choice(names)
+        angle = rng.uniform(0, 2 * math.pi)
+        distance = rng.uniform(min_distance, max_distance)
+        x = game.player_x + math.cos(angle) * distance
+        y = game.player_y + math.sin(angle) * distance
+        stats = zombie_types[ztype]
+        game.add_zombie(x, y, stats["speed"], stats["health"], ztype)
+
+
+def keep_alive(game):
+    """Heal the player and restock ammo so the scenario never ends early"""
+    game.over = False
+    game.player_health = game.player_max_health
+    for name, amount in starting_ammo.items():
+        game.ammo[name] = max(game.ammo[name], amount)
+
+
+def fire_at_will(game):
+    """Keep the player alive and let the current weapon fire every tick"""
+    keep_alive(game)
+    game.last_shot_time = -math.inf
+
+
+def kill_streak(game, kills_per_tick=5):
+    """Keep the player alive and kill zombies around it, leaving blood and loot"""
+    keep_alive(game)
+    rng = game.rng
+    for _ in range(kills_per_tick):
+        angle = rng.uniform(0, 2 * math.pi)
+        distance = rng.uniform(50, 350)
+        game.kill_zombie(game.player_x + math.cos(angle) * distance,
+                         game.player_y + math.sin(angle) * distance, rng.choice(list(zombie_types)))
+
+
+def late_wave(game, wave=30):
+    """Jump straight to a late wave, where spawning is fastest"""
+    game.wave = wave
+    game.zombies_per_wave = zombies_in_wave(wave)
+
+
+def sweep_policy(game, weapon=None):
+    """Stand still, turn a little every tick and keep the trigger held"""
+    return Inputs(0, 0, game.frame * 0.05, True, weapon)
+
+
+def shotgun_policy(game):
+    """Like sweep_policy, but with the shotgun"""
+    return sweep_policy(game, "shotgun" if game.frame == 0 else None)
+
+
+scenarios = {
+    "zombies_500": {"setup": lambda game: add_zombies(game, 500), "policy": sweep_policy, "hook": keep_alive},
+    "zombies_2000": {"setup": lambda game: add_zombies(game, 2000), "policy": sweep_policy, "hook": keep_alive},
+    "zombies_10000": {"setup": lambda game: add_zombies(game, 10000), "policy": sweep_policy, "hook": keep_alive},
+    "distant_2000": {"setup": lambda game: add_zombies(game, 2000, 700, 2500), "policy": sweep_policy,
+                     "hook": keep_alive},
+    "shotgun": {"setup": lambda game: add_zombies(game, 500), "policy": shotgun_policy, "hook": fire_at_will},
+    "blood": {"setup": None, "policy": sweep_policy, "hook": kill_streak},
+    "late_wave": {"setup": late_wave, "policy": sweep_policy, "hook": keep_alive},
+}
+
+
+# Running and reporting
+
+def summarize(samples):
+    """Return the percentiles, mean and max of a list of ms timings"""
+    summary = {name: round(percentile(samples, fraction), 4) for name, fraction in percentiles.items()}
+    summary["mean"] = round(sum(samples) / len(samples), 4) if samples else 0.0
+    summary["max"] = round(max(samples), 4) if samples else 0.0
+    return summary
+
+
+def run_scenario(scenario, world, renderer=None, ticks=600, warmup=30, seed=0, use_numpy=False):
+    """Run a scenario and return its timing summary"""
+    game = Game(world, seed, use_numpy)
+    if scenario["setup"] is not None:
+        scenario["setup"](game)
+    policy = scenario["policy"]
+    hook = scenario["hook"]
+
+    timer = PhaseTimer()
+    game.timer = timer
+    if renderer is not None:
+        renderer.reset()
+        renderer.timer = timer
+
+    frames = []
+    phases = {}
+    entity_counts = []
+    for tick in range(warmup + ticks):
+        # Scenario hooks are not part of a frame
+        if hook is not None:
+            hook(game)
+
+        timer.start()
+        inputs = policy(game)
+        timer.lap("input")
+        game.step(inputs)
+        if renderer is not None:
+            renderer.draw_game(game)
+        frame_phases = timer.finish()
+
+        if tick < warmup:
+            continue
+        frames.append(sum(frame_phases.values()))
+        for name, ms in frame_phases.items():
+            phases.setdefault(name, []).append(ms)
+        entity_counts.append((len(game.zombies), len(game.bullets), len(game.blood_splatters)))
+
+    return {
+        "ticks": ticks,
+        "zombies": round(sum(count[0] for count in entity_counts) / ticks, 1),
+        "bullets": round(sum(count[1] for count in entity_counts) / ticks, 1),
+        "blood_splatters": round(sum(count[2] for count in entity_counts) / ticks, 1),
+        "frame": summarize(frames),
+        "phases": {name: summarize(samples + [0.0] * (ticks - len(samples))) for name, samples in phases.items()},
+        "pools": game.pool_stats(),
+    }
+
+
+def meta_mismatches(results, baseline):
+    """Return a description of every run setting that differs from the baseline's"""
+    mismatches = []
+    for key, default in comparable_meta.items():
+        new = results["meta"].get(key, default)
+        old = baseline.get("meta", {}).get(key, default)
+        if new != old:
+            mismatches.append(f"{key}: {old} in the baseline, {new} now")
+    return mismatches
+
+
+def compare(results, baseline, tolerance, noise_ms=0.05):
+    """Print results next to a baseline and return the list of regressions.
+
+    A timing regresses if it is more than tolerance (a fraction) and more
+    than noise_ms slower than in the baseline.
+    """
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name}: not in baseline")
+            continue
+
+        rows = [("frame", result["frame"], base["frame"])]
+        rows += [(phase, summary, base["phases"][phase])
+                 for phase, summary in result["phases"].items() if phase in base["phases"]]
+        print(name)
+        for label, new, old in rows:
+            cells = []
+            for key in percentiles:
+                change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                cells.append(f"{key} {new[key]:8.3f}ms ({change:+6.1f}%)")
+                if new[key] > old[key] * (1 + tolerance) and new[key] - old[key] > noise_ms:
+                    regressions.append(f"{name} {label} {key}: {old[key]:.3f}ms -> {new[key]:.3f}ms")
+            print(f"  {label:<10} " + "  ".join(cells))
+    return regressions
+
+
+def make_renderer(world, quality=0):
+    """Open an offscreen window and return a Renderer drawing into it at a quality tier"""
+    import pygame
+    from render import Renderer
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    renderer = Renderer(screen, world)
+    renderer.set_quality(quality)
+    return renderer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Zombie Survival in stress scenarios")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"scenarios to run (default: all of {', '.join(scenarios)})")
+    parser.add_argument("--ticks", type=int, default=600, help="measured ticks per scenario")
+    parser.add_argument("--warmup", type=int, default=30, help="unmeasured ticks before measuring")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the map and every scenario")
+    parser.add_argument("--numpy", action="store_true", help="keep zombies and bullets in NumPy arrays")
+    parser.add_argument("--no-render", action="store_true", help="time the simulation only")
+    parser.add_argument("--quality", type=int, choices=range(len(quality_tiers)), default=0,
+                        help="drawing quality tier, from 0 (full)")
+    parser.add_argument("--output", metavar="PATH", default="benchmark.json", help="where to write the results")
+    parser.add_argument("--baseline", metavar="PATH", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args()
+
+    names = args.scenarios or list(scenarios)
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+    use_numpy = args.numpy and entity_arrays.available()
+    if args.numpy and not use_numpy:
+        print("NumPy is not installed, using the list backend")
+
+    world = generate_map(args.seed)
+    renderer = None if args.no_render else make_renderer(world, args.quality)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": use_numpy,
+            "render": renderer is not None,
+            "quality": args.quality,
+            "seed": args.seed,
+            "ticks": args.ticks,
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        result = run_scenario(scenarios[name], world, renderer, args.ticks, args.warmup, args.seed, use_numpy)
+        results["scenarios"][name] = result
+        frame = result["frame"]
+        print(f"{name}: p50 {frame['p50']:.3f}ms, p95 {frame['p95']:.3f}ms, p99 {frame['p99']:.3f}ms "
+              f"({result['zombies']:.0f} zombies, {result['bullets']:.0f} bullets, "
+              f"{result['blood_splatters']:.0f} splatters on average)")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatches = meta_mismatches(results, baseline)
+        if mismatches:
+            print(f"not comparing against {args.baseline}, which was run with different settings:")
+            for mismatch in mismatches:
+                print(f"  {mismatch}")
+            sys.exit(2)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import math
+
+import pygame
+
+
+class BloodDecals:
+    """Blood splatters stamped into persistent world-space layers.
+
+    The world is cut into square layers that are only allocated where blood
+    has landed. Splatters are stamped once from a pool of pre-rendered
+    circles, and every few hundred milliseconds each live layer loses the
+    same amount of alpha, so blood fades out over duration ms no matter how
+    many splatters there are.
+    """
+
+    def __init__(self, duration=10000, chunk_size=400, fade_interval=250, color=(200, 0, 0), max_radius=25):
+        self.duration = duration
+        self.chunk_size = chunk_size
+        self.fade_interval = fade_interval
+        self.color = color
+        self.stamps = {}
+        for radius in range(1, max_radius + 1):
+            self._stamp(radius)
+
+        self.layers = {}  # (cx, cy) -> [surface, last stamp time]
+        self.free_layers = []
+        self.max_free_layers = 8
+        self.max_stamps = None  # most splatters stamped per sync (the newest), or None for all
+        self.last_synced = -math.inf
+        self.last_fade = None
+        self.fade_carry = 0.0
+
+    def _stamp(self, radius):
+        """Return the pre-rendered splat for a radius, rendering it if needed"""
+        stamp = self.stamps.get(radius)
+        if stamp is None:
+            stamp = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(stamp, (*self.color, 255), (radius, radius), radius)
+            self.stamps[radius] = stamp
+        return stamp
+
+    def _layer(self, key, now):
+        """Return the layer for a chunk, taking one from the pool if needed"""
+        layer = self.layers.get(key)
+        if layer is None:
+            if self.free_layers:
+                surface = self.free_layers.pop()
+                surface.fill((0, 0, 0, 0))
+            else:
+                surface = pygame.Surface((self.chunk_size, self.chunk_size), pygame.SRCALPHA)
+            layer = self.layers[key] = [surface, now]
+        layer[1] = now
+        return layer[0]
+
+    def add(self, x, y, radius, now):
+        """Stamp a splatter of the given radius centered on a world position"""
+        stamp = self._stamp(int(radius))
+        left = int(x - radius)
+        top = int(y - radius)
+        size = self.chunk_size
+        for cx in range(left // size, (left + stamp.get_width()) // size + 1):
+            for cy in range(top // size, (top + stamp.get_height()) // size + 1):
+                self._layer((cx, cy), now).blit(stamp, (left - cx * size, top - cy * size))
+
+    def sync(self, blood_splatters, now):
+        """Stamp the [x, y, size, time] entries added since the last sync"""
+        stamped = 0
+        for bx, by, bsize, btime in reversed(blood_splatters):
+            if btime <= self.last_synced or stamped == self.max_stamps:
+                break
+            self.add(bx, by, bsize, now)
+            stamped += 1
+        self.last_synced = now
+
+    def fade(self, now):
+        """Take alpha off every layer and release layers that have faded out"""
+        if self.last_fade is None:
+            self.last_fade = now
+        elapsed = now - self.last_fade
+        if elapsed < self.fade_interval:
+            return
+        self.last_fade = now
+
+        # Carry the fraction so the fade stays linear over the full duration
+        self.fade_carry += 255 * elapsed / self.duration
+        step = min(255, int(self.fade_carry))
+        self.fade_carry -= step
+
+        faded = []
+        for key, (surface, last_stamp) in self.layers.items():
+            if now - last_stamp >= self.duration + self.fade_interval:
+                faded.append(key)
+            elif step:
+                surface.fill((0, 0, 0, step), special_flags=pygame.BLEND_RGBA_SUB)
+
+        for key in faded:
+            surface = self.layers.pop(key)[0]
+            if len(self.free_layers) < self.max_free_layers:
+                self.free_layers.append(surface)
+
+    def draw(self, surface, camera_x, camera_y):
+        """Blit the layers overlapping the view"""
+        size = self.chunk_size
+        width, height = surface.get_size()
+        blits = []
+        for cx in range(math.floor(camera_x / size), math.floor((camera_x + width - 1) / size) + 1):
+            for cy in range(math.floor(camera_y / size), math.floor((camera_y + height - 1) / size) + 1):
+                layer = self.layers.get((cx, cy))
+                if layer is not None:
+                    blits.append((layer[0], (cx * size - camera_x, cy * size - camera_y)))
+        surface.blits(blits, doreturn=False)
+
+    def clear(self):
+        """Remove all blood"""
+        for surface, _ in self.layers.values():
+            if len(self.free_layers) < self.max_free_layers:
+                self.free_layers.append(surface)
+        self.layers.clear()
+        self.last_synced = -math.inf
+        self.last_fade = None
+        self.fade_carry = 0.0
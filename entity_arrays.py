@@ -0,0 +1,470 @@
+"""Optional NumPy structure-of-arrays storage for zombies and bullets.
+
+The stores take and yield the same entries as the plain lists in main2.py.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Grid cells searched for separation neighbors, nearest first
+separation_cells = [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+def available():
+    """Return True if NumPy can be imported"""
+    return np is not None
+
+
+def ranges(starts, counts):
+    """Return the indices start, start + 1, ... of count entries for every (start, count), one after another"""
+    within = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + within
+
+
+def swap_remove_order(keep):
+    """Return the indices of the kept entries, in the order the list backend leaves them.
+
+    Game removes list entries from the back with pool.swap_remove, which
+    moves the last entry into each gap; following the same order keeps
+    the index of every entity, and so the game, the same on both backends.
+    """
+    order = np.arange(len(keep))
+    count = len(keep)
+    for index in np.flatnonzero(~keep)[::-1].tolist():
+        count -= 1
+        order[index] = order[count]
+    return order[:count]
+
+
+class ZombieArrays:
+    """Zombie positions, speeds, health and type IDs in contiguous arrays"""
+
+    def __init__(self, zombie_types, capacity=256):
+        self.type_names = list(zombie_types)
+        self.type_ids = {name: i for i, name in enumerate(self.type_names)}
+        self.type_size = np.array([zombie_types[name]["size"] for name in self.type_names], dtype=np.float64)
+        self.type_damage = np.array([zombie_types[name]["damage"] for name in self.type_names], dtype=np.float64)
+        self.type_separation = np.array([zombie_types[name]["separation"] for name in self.type_names])
+        self.type_separation_radius = np.array([zombie_types[name]["separation_radius"] for name in self.type_names])
+
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.health = np.zeros(capacity)
+        self.type_id = np.zeros(capacity, dtype=np.int16)
+        self.prev_x = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+        self.field_steer = None  # the flow field's steer list that field_arrays were made from
+        self.field_arrays = None  # (steer, dir_x, dir_y) of the flow field as arrays
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yield (x, y, speed, health, type, prev_x, prev_y) like the list entries"""
+        n = self.count
+        names = self.type_names
+        for x, y, speed, health, type_id, prev_x, prev_y in zip(self.x[:n].tolist(), self.y[:n].tolist(),
+                                                                self.speed[:n].tolist(), self.health[:n].tolist(),
+                                                                self.type_id[:n].tolist(),
+                                                                self.prev_x[:n].tolist(), self.prev_y[:n].tolist()):
+            yield x, y, speed, health, names[type_id], prev_x, prev_y
+
+    def _grow(self):
+        """Double the capacity of every array"""
+        capacity = len(self.x) * 2
+        for name in ("x", "y", "speed", "health", "type_id", "prev_x", "prev_y"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def append(self, zombie):
+        """Add a zombie given as [x, y, speed, health, type, prev_x, prev_y]"""
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i], self.y[i], self.speed[i], self.health[i] = zombie[:4]
+        self.type_id[i] = self.type_ids[zombie[4]]
+        self.prev_x[i], self.prev_y[i] = zombie[5:7]
+        self.count += 1
+
+    def sizes(self):
+        """Return the sprite size of every live zombie"""
+        return self.type_size[self.type_id[:self.count]]
+
+    def seek(self, target_x, target_y, field=None, lod=None, frame=0):
+        """Move zombies towards a point at their own speed and return how many ticks each moved by.
+
+        Given a flowfield.FlowField, zombies inside it follow its directions
+        and the rest head straight for the point. Given (distance, interval)
+        levels of detail like game.zombie_lod, distant zombies only move on
+        every interval-th tick (staggered by index), interval steps at once.
+        """
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        dir_x = target_x - self.x[:n]
+        dir_y = target_y - self.y[:n]
+        length = np.hypot(dir_x, dir_y)
+        if lod is None:
+            steps = np.ones(n)
+        else:
+            interval = np.full(n, lod[-1][1])
+            for distance, level_interval in reversed(lod[:-1]):
+                interval[length <= distance] = level_interval
+            steps = np.where((frame + np.arange(n)) % interval == 0, interval, 0).astype(np.float64)
+        moving = length != 0
+        np.divide(dir_x, length, out=dir_x, where=moving)
+        np.divide(dir_y, length, out=dir_y, where=moving)
+        if field is not None:
+            size = field.size
+            cell_x = np.floor(self.x[:n] / field.cell_size).astype(np.intp) - field.origin[0]
+            cell_y = np.floor(self.y[:n] / field.cell_size).astype(np.intp) - field.origin[1]
+            inside = (cell_x >= 0) & (cell_x < size) & (cell_y >= 0) & (cell_y < size)
+            index = np.where(inside, cell_y * size + cell_x, 0)
+            if field.steer is not self.field_steer:
+                # Convert the field once per change of field rather than every tick
+                self.field_steer = field.steer
+                self.field_arrays = np.asarray(field.steer), np.asarray(field.dir_x), np.asarray(field.dir_y)
+            field_steer, field_dir_x, field_dir_y = self.field_arrays
+            steer = inside & field_steer[index]
+            dir_x = np.where(steer, field_dir_x[index], dir_x)
+            dir_y = np.where(steer, field_dir_y[index], dir_y)
+        self.x[:n] += dir_x * self.speed[:n] * steps
+        self.y[:n] += dir_y * self.speed[:n] * steps
+        return steps
+
+    def separate(self, cell_size, max_neighbors, max_candidates, steps=None, interval=1, frame=0):
+        """Push zombies that crowd each other apart, like Game.separate_zombies().
+
+        The zombies are sorted by grid cell, and the candidates of every
+        cell that holds a moving zombie are found at once: the first
+        max_candidates zombies of the cell and then of its 8 neighbors,
+        found by binary search. Each moving zombie keeps the first
+        max_neighbors of its cell's candidates that are close enough. Given
+        the steps returned by seek(), only zombies that moved are pushed,
+        as far as they moved. Given an interval, zombies are only pushed on
+        every interval-th tick (staggered by index), interval ticks' worth.
+        """
+        n = self.count
+        if n < 2:
+            return
+        if steps is None:
+            steps = np.ones(n)
+        active = np.flatnonzero((steps != 0) & ((frame + np.arange(n)) % interval == 0))
+        if active.size == 0:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        row = 1 << 32
+        key = np.floor(x / cell_size).astype(np.int64) * row + np.floor(y / cell_size).astype(np.int64)
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+
+        # The occupied cells, where each one's zombies start in order, and how many it holds
+        first = np.flatnonzero(np.concatenate(([True], sorted_key[1:] != sorted_key[:-1])))
+        cells = sorted_key[first]
+        cell_sizes = np.diff(np.append(first, n))
+        cell_of = np.empty(n, np.intp)
+        cell_of[order] = np.repeat(np.arange(cells.size), cell_sizes)
+
+        # Candidates of every occupied cell, nearest cells first
+        targets = cells[:, None] + np.array([dx * row + dy for dx, dy in separation_cells], np.int64)
+        found = np.minimum(np.searchsorted(cells, targets), cells.size - 1)
+        counts = np.where(cells[found] == targets, cell_sizes[found], 0)
+        counts = np.clip(max_candidates - (np.cumsum(counts, axis=1) - counts), 0, counts)
+        candidates = order[ranges(first[found].ravel(), counts.ravel())]
+        cell_counts = counts.sum(axis=1)
+        cell_starts = np.cumsum(cell_counts) - cell_counts
+
+        # Pair every moving zombie with its cell's candidates, keeping the close ones
+        active_cells = cell_of[active]
+        counts = cell_counts[active_cells]
+        i = np.repeat(active, counts)
+        j = candidates[ranges(cell_starts[active_cells], counts)]
+        type_id = self.type_id[:n]
+        radius = self.type_separation_radius[type_id]
+        dx = x[i] - x[j]
+        dy = y[i] - y[j]
+        dist_sq = dx * dx + dy * dy
+        near = (i != j) & (dist_sq < radius[i] * radius[i])
+
+        # Keep each zombie's first max_neighbors neighbors
+        i = i[near]
+        per_zombie = np.bincount(i, minlength=n)
+        first_neighbors = np.arange(i.size) - (np.cumsum(per_zombie) - per_zombie)[i] < max_neighbors
+        i = i[first_neighbors]
+        if i.size == 0:
+            return
+        keep = np.flatnonzero(near)[first_neighbors]
+        dx = dx[keep]
+        dy = dy[keep]
+        dist = np.sqrt(dist_sq[keep])
+        stacked = dist == 0
+        if stacked.any():
+            dx[stacked] = np.cos(i[stacked])
+            dy[stacked] = np.sin(i[stacked])
+            dist[stacked] = 1.0
+        strength = 1 - dist / radius[i]
+        push_x = np.bincount(i, weights=dx / dist * strength, minlength=n)
+        push_y = np.bincount(i, weights=dy / dist * strength, minlength=n)
+
+        # A push never moves a zombie further than it moved in the ticks it stands for
+        reach = self.speed[:n] * steps * interval
+        push_x *= self.type_separation[type_id] * reach
+        push_y *= self.type_separation[type_id] * reach
+        length = np.hypot(push_x, push_y)
+        too_far = length > reach
+        push_x[too_far] *= reach[too_far] / length[too_far]
+        push_y[too_far] *= reach[too_far] / length[too_far]
+        x += push_x
+        y += push_y
+
+    def push_out(self, obstacles, steps=None):
+        """Move zombies out of the static obstacles of an obstacles.ObstacleIndex.
+
+        Given the steps returned by seek(), only zombies that moved are checked.
+        """
+        n = self.count
+        movers = np.arange(n) if steps is None else np.flatnonzero(steps)
+        if movers.size == 0:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        radius = self.type_size[self.type_id[:n]] / 2
+        cell_x = np.floor(x[movers] / obstacles.cell_size).astype(np.int64)
+        cell_y = np.floor(y[movers] / obstacles.cell_size).astype(np.int64)
+
+        # Only the few cells that hold both zombies and obstacles need resolving
+        occupied = set(zip(cell_x.tolist(), cell_y.tolist()))
+        per_chunk = obstacles.cells_per_chunk
+        chunks = set(zip((cell_x // per_chunk).tolist(), (cell_y // per_chunk).tolist()))
+        for chunk in chunks:
+            cells = obstacles.chunk_cells(*chunk)
+            for cell in occupied & cells.keys():
+                inside = movers[(cell_x == cell[0]) & (cell_y == cell[1])]
+                for ox, oy, obstacle_radius in cells[cell]:
+                    dx = x[inside] - ox
+                    dy = y[inside] - oy
+                    dist = np.hypot(dx, dy)
+                    overlap = obstacle_radius + radius[inside] - dist
+                    hit = overlap > 0
+                    if not hit.any():
+                        continue
+                    centered = dist == 0
+                    dx[centered] = 1.0
+                    dist[centered] = 1.0
+                    x[inside[hit]] += (dx / dist * overlap)[hit]
+                    y[inside[hit]] += (dy / dist * overlap)[hit]
+
+    def contact_damage(self, px, py, radius):
+        """Return the damage of every zombie touching a circle, in index order"""
+        n = self.count
+        distance = np.hypot(px - self.x[:n], py - self.y[:n])
+        touching = distance < radius + self.sizes() / 2
+        return self.type_damage[self.type_id[:n][touching]].tolist()
+
+    def compact(self, keep):
+        """Drop zombies where keep is False, leaving the rest in the list backend's order"""
+        order = swap_remove_order(keep)
+        for arr in (self.x, self.y, self.speed, self.health, self.type_id, self.prev_x, self.prev_y):
+            arr[:order.size] = arr[order]
+        self.count = order.size
+
+
+class BulletArrays:
+    """Bullet positions, velocities, damage, radius, color IDs, hits left and firing frames in contiguous arrays"""
+
+    def __init__(self, capacity=64):
+        self.colors = []
+        self.color_ids = {}
+
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.dx = np.zeros(capacity)
+        self.dy = np.zeros(capacity)
+        self.damage = np.zeros(capacity)
+        self.radius = np.zeros(capacity, dtype=np.int16)
+        self.color_id = np.zeros(capacity, dtype=np.int16)
+        self.hits_left = np.zeros(capacity, dtype=np.int16)
+        self.fired = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yield (x, y, dx, dy, damage, radius, color, hits left, frame fired) like the list entries"""
+        n = self.count
+        colors = self.colors
+        for x, y, dx, dy, damage, radius, color_id, hits_left, fired in zip(
+                self.x[:n].tolist(), self.y[:n].tolist(), self.dx[:n].tolist(), self.dy[:n].tolist(),
+                self.damage[:n].tolist(), self.radius[:n].tolist(), self.color_id[:n].tolist(),
+                self.hits_left[:n].tolist(), self.fired[:n].tolist()):
+            yield x, y, dx, dy, damage, radius, colors[color_id], hits_left, fired
+
+    def _grow(self):
+        """Double the capacity of every array"""
+        capacity = len(self.x) * 2
+        for name in ("x", "y", "dx", "dy", "damage", "radius", "color_id", "hits_left", "fired"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def append(self, bullet):
+        """Add a bullet given as [x, y, dx, dy, damage, radius, color, hits left, frame fired]"""
+        if self.count == len(self.x):
+            self._grow()
+        color = bullet[6]
+        if color not in self.color_ids:
+            self.color_ids[color] = len(self.colors)
+            self.colors.append(color)
+        i = self.count
+        self.x[i], self.y[i], self.dx[i], self.dy[i], self.damage[i], self.radius[i] = bullet[:6]
+        self.color_id[i] = self.color_ids[color]
+        self.hits_left[i], self.fired[i] = bullet[7:9]
+        self.count += 1
+
+    def advance(self):
+        """Move every bullet by its velocity"""
+        n = self.count
+        self.x[:n] += self.dx[:n]
+        self.y[:n] += self.dy[:n]
+
+    def cull(self, px, py, max_distance, obstacles):
+        """Remove bullets that are max_distance or further from a point or hit an obstacles.ObstacleIndex obstacle"""
+        n = self.count
+        if n == 0:
+            return
+        keep = np.hypot(self.x[:n] - px, self.y[:n] - py) < max_distance
+        keep &= np.array([not obstacles.blocks(x, y, radius)
+                          for x, y, radius in zip(self.x[:n].tolist(), self.y[:n].tolist(), self.radius[:n].tolist())])
+        if not keep.all():
+            self.compact(keep)
+
+    def compact(self, keep):
+        """Drop bullets where keep is False, leaving the rest in the list backend's order"""
+        order = swap_remove_order(keep)
+        for arr in (self.x, self.y, self.dx, self.dy, self.damage, self.radius, self.color_id, self.hits_left,
+                    self.fired):
+            arr[:order.size] = arr[order]
+        self.count = order.size
+
+
+def resolve_bullet_hits(zombies, bullets, cell_size, frame):
+    """Match bullets to the zombies they hit, like Game.collide_bullets().
+
+    Each bullet is swept along its path for the tick, relative to each
+    zombie's own movement, against the zombies in the grid cells around its
+    path (zombies are sorted by cell and found by binary search). A bullet
+    hits the first hits_left zombies it enters, nearest along the path first.
+    Returns (zombie index, bullet index, hit x, hit y) arrays sorted by
+    zombie, then by bullet.
+    """
+    n = zombies.count
+    m = bullets.count
+    if n == 0 or m == 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, np.zeros(0), np.zeros(0)
+
+    zx = zombies.x[:n]
+    zy = zombies.y[:n]
+    row = 1 << 32
+    key = np.floor(zx / cell_size).astype(np.int64) * row + np.floor(zy / cell_size).astype(np.int64)
+    order = np.argsort(key, kind="stable")
+    sorted_key = key[order]
+
+    # The cells around each bullet's path: its bounding box, grown by a cell
+    end_x = bullets.x[:m]
+    end_y = bullets.y[:m]
+    start_x = end_x - bullets.dx[:m]
+    start_y = end_y - bullets.dy[:m]
+    first_x = np.floor(np.minimum(start_x, end_x) / cell_size).astype(np.int64) - 1
+    first_y = np.floor(np.minimum(start_y, end_y) / cell_size).astype(np.int64) - 1
+    width = np.floor(np.maximum(start_x, end_x) / cell_size).astype(np.int64) + 2 - first_x
+    height = np.floor(np.maximum(start_y, end_y) / cell_size).astype(np.int64) + 2 - first_y
+    cell_counts = width * height
+    cell_bullet = np.repeat(np.arange(m), cell_counts)
+    within = np.arange(int(cell_counts.sum())) - np.repeat(np.cumsum(cell_counts) - cell_counts, cell_counts)
+    cell_key = ((first_x[cell_bullet] + within // height[cell_bullet]) * row
+                + first_y[cell_bullet] + within % height[cell_bullet])
+
+    # Expand each cell's range of zombies into (bullet, zombie) pairs
+    start = np.searchsorted(sorted_key, cell_key, "left")
+    counts = np.searchsorted(sorted_key, cell_key, "right") - start
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, np.zeros(0), np.zeros(0)
+    offset = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    j = np.repeat(cell_bullet, counts)
+    i = order[np.repeat(start, counts) + offset]
+
+    # Solve for when each path enters each zombie's circle (see game.segment_hit_time)
+    x0 = start_x[j] - zombies.prev_x[i]
+    y0 = start_y[j] - zombies.prev_y[i]
+    dx = end_x[j] - zx[i] - x0
+    dy = end_y[j] - zy[i] - y0
+    radius = zombies.type_size[zombies.type_id[i]] / 2 + bullets.radius[j]
+    a = dx * dx + dy * dy
+    b = x0 * dx + y0 * dy
+    c = x0 * x0 + y0 * y0 - radius * radius
+    discriminant = b * b - a * c
+    entering = (c >= 0) & (b < 0) & (discriminant >= 0) & (a > 0)
+    t = np.full(total, np.inf)
+    t[entering] = (-b[entering] - np.sqrt(discriminant[entering])) / a[entering]
+    t[(c < 0) & (bullets.fired[j] == frame)] = 0.0
+    hit = t <= 1
+    i = i[hit]
+    j = j[hit]
+    t = t[hit]
+
+    # Keep each bullet's first hits_left hits along its path
+    by_bullet = np.lexsort((i, t, j))
+    i = i[by_bullet]
+    j = j[by_bullet]
+    t = t[by_bullet]
+    per_bullet = np.bincount(j, minlength=m)
+    rank = np.arange(j.size) - (np.cumsum(per_bullet) - per_bullet)[j]
+    keep = rank < bullets.hits_left[j]
+    i = i[keep]
+    j = j[keep]
+    t = t[keep]
+
+    by_zombie = np.lexsort((j, i))
+    i = i[by_zombie]
+    j = j[by_zombie]
+    t = t[by_zombie]
+    return i, j, start_x[j] + bullets.dx[j] * t, start_y[j] + bullets.dy[j] * t
+
+
+def collide_bullets(zombies, bullets, cell_size, frame):
+    """Apply bullet hits and remove spent bullets and dead zombies.
+
+    Returns the (x, y) of every hit and the (x, y, type) of every zombie killed.
+    """
+    hit_zombies, hit_bullets, hit_x, hit_y = resolve_bullet_hits(zombies, bullets, cell_size, frame)
+    if hit_bullets.size == 0:
+        return [], []
+
+    hits = list(zip(hit_x.tolist(), hit_y.tolist()))
+    np.subtract.at(zombies.health, hit_zombies, bullets.damage[hit_bullets])
+
+    m = bullets.count
+    bullets.hits_left[:m] -= np.bincount(hit_bullets, minlength=m).astype(np.int16)
+    bullets.compact(bullets.hits_left[:m] > 0)
+
+    n = zombies.count
+    dead = zombies.health[:n] <= 0
+    names = zombies.type_names
+    killed = [(x, y, names[type_id]) for x, y, type_id in zip(zombies.x[:n][dead].tolist(),
+                                                              zombies.y[:n][dead].tolist(),
+                                                              zombies.type_id[:n][dead].tolist())]
+    if killed:
+        zombies.compact(~dead)
+    return hits, killed
@@ -0,0 +1,408 @@
+"""The game as a reinforcement learning environment, one or many instances at a time.
+
+ZombieEnv follows the Gym API: reset(seed) starts a game and returns
+(observation, info), and step(action) runs it forward and returns
+(observation, reward, terminated, truncated, info). gym itself is not needed.
+
+VecEnv steps a batch of environments in this process, and ProcessVecEnv
+spreads the batch over worker processes; both take a list of actions and
+return lists, and reset each game as soon as it ends.
+
+    python env.py --envs 32 --steps 2000
+    python env.py --envs 32 --processes 4 --frame-skip 4
+"""
+import argparse
+import heapq
+import math
+import multiprocessing
+import numbers
+import os
+import random
+import time
+
+import entity_arrays
+from game import Game, Inputs, generate_map, powerup_types, weapons_list, zombie_types
+
+zombie_type_list = list(zombie_types)
+powerup_type_list = list(powerup_types)
+
+
+# Observations
+
+def observe(game, max_zombies=8, max_powerups=4):
+    """Return what the player can see, relative to the player where it is a position.
+
+    player is (x, y, health, max health, speed, level, aim angle), zombies
+    is up to max_zombies (dx, dy, health, type index) nearest first, and
+    powerups is up to max_powerups (dx, dy, type index) nearest first.
+    """
+    px, py = game.player_x, game.player_y
+    return {
+        "player": (px, py, game.player_health, game.player_max_health, game.player_speed, game.player_level,
+                   game.aim_angle),
+        "weapon": weapons_list.index(game.current_weapon),
+        "ammo": tuple(game.ammo[name] for name in weapons_list),
+        "wave": game.wave,
+        "wave_cleared": game.wave_cleared,
+        "zombies": nearest_zombies(game, max_zombies),
+        "powerups": tuple((x - px, y - py, powerup_type_list.index(ptype))
+                          for x, y, ptype, _ in heapq.nsmallest(max_powerups, game.powerups,
+                                                                key=lambda p: (p[0] - px) ** 2 + (p[1] - py) ** 2)),
+    }
+
+
+def nearest_zombies(game, count):
+    """Return the nearest zombies to the player as (dx, dy, health, type index), nearest first"""
+    px, py = game.player_x, game.player_y
+    if game.use_numpy:
+        zombies = game.zombies
+        n = zombies.count
+        dx = zombies.x[:n] - px
+        dy = zombies.y[:n] - py
+        dist = dx * dx + dy * dy
+        if n > count:
+            nearest = entity_arrays.np.argpartition(dist, count)[:count]
+        else:
+            nearest = entity_arrays.np.arange(n)
+        nearest = nearest[entity_arrays.np.argsort(dist[nearest], kind="stable")]
+        return tuple(zip(dx[nearest].tolist(), dy[nearest].tolist(), zombies.health[nearest].tolist(),
+                         zombies.type_id[nearest].tolist()))
+    nearest = heapq.nsmallest(count, game.zombies, key=lambda z: (z[0] - px) ** 2 + (z[1] - py) ** 2)
+    return tuple((z[0] - px, z[1] - py, z[3], zombie_type_list.index(z[4])) for z in nearest)
+
+
+def observation_size(max_zombies=8, max_powerups=4):
+    """Return the length of a flattened observation"""
+    return 7 + 1 + len(weapons_list) + 2 + max_zombies * 5 + max_powerups * 4
+
+
+def flatten(observation, max_zombies=8, max_powerups=4):
+    """Return an observation as a flat list of floats of observation_size() length.
+
+    Zombie and powerup slots start with 1 if they are filled and are all
+    zeros if not.
+    """
+    values = list(observation["player"])
+    values.append(observation["weapon"])
+    values.extend(observation["ammo"])
+    values.append(observation["wave"])
+    values.append(float(observation["wave_cleared"]))
+    for slots, entries, width in ((max_zombies, observation["zombies"], 4),
+                                  (max_powerups, observation["powerups"], 3)):
+        for entry in entries[:slots]:
+            values.append(1.0)
+            values.extend(entry)
+        values.extend([0.0] * ((width + 1) * (slots - min(len(entries), slots))))
+    return [float(value) for value in values]
+
+
+# Actions
+
+def to_inputs(action):
+    """Turn an action into game Inputs.
+
+    An action is (move x, move y, aim angle, fire, weapon) or Inputs, and may
+    be a NumPy array. Moves are rounded and clamped to -1, 0 or 1. weapon is
+    a weapon's name or its index in weapons_list, which can be any integer
+    or a float with an integral value; None or a negative index keeps the
+    current weapon.
+    """
+    if isinstance(action, Inputs):
+        return action
+    move_x, move_y, aim_angle, fire, weapon = action
+    return Inputs(max(-1, min(1, int(round(move_x)))), max(-1, min(1, int(round(move_y)))), float(aim_angle),
+                  bool(fire), to_weapon(weapon))
+
+
+def to_weapon(weapon):
+    """Return the weapon name an action's weapon entry stands for, or None to keep the current one"""
+    if weapon is None:
+        return None
+    if isinstance(weapon, str):
+        if weapon not in weapons_list:
+            raise ValueError(f"unknown weapon {weapon!r}, expected one of {weapons_list}")
+        return weapon
+    if isinstance(weapon, numbers.Real) and not isinstance(weapon, bool):
+        if isinstance(weapon, numbers.Integral) or float(weapon).is_integer():
+            index = int(weapon)
+            if index < 0:
+                return None
+            if index < len(weapons_list):
+                return weapons_list[index]
+    raise ValueError(f"weapon must be a name, None or an index below {len(weapons_list)}, got {weapon!r}")
+
+
+# Environments
+
+class ZombieEnv:
+    """One game behind reset() and step().
+
+    Each step repeats the action for frame_skip ticks. The reward is the
+    score gained over those ticks. A game is truncated after max_ticks
+    ticks, if given.
+    """
+
+    def __init__(self, use_numpy=False, frame_skip=1, max_ticks=None, max_zombies=8, max_powerups=4):
+        self.use_numpy = use_numpy
+        self.frame_skip = frame_skip
+        self.max_ticks = max_ticks
+        self.max_zombies = max_zombies
+        self.max_powerups = max_powerups
+        self.game = None
+
+    def reset(self, seed=None):
+        """Start a new game on a new map, both from seed; returns (observation, info)"""
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.game = Game(generate_map(seed), seed, self.use_numpy)
+        return self.observe(), self.info()
+
+    def step(self, action):
+        """Play an action; returns (observation, reward, terminated, truncated, info)"""
+        game = self.game
+        inputs = to_inputs(action)
+        score = game.player_score
+        for _ in range(self.frame_skip):
+            game.step(inputs)
+            if game.over:
+                break
+            # Only switch weapons once
+            inputs = inputs._replace(weapon=None)
+        truncated = not game.over and self.max_ticks is not None and game.frame >= self.max_ticks
+        return self.observe(), game.player_score - score, game.over, truncated, self.info()
+
+    def observe(self):
+        """Return the current observation"""
+        return observe(self.game, self.max_zombies, self.max_powerups)
+
+    def info(self):
+        """Return episode statistics that are not part of the observation"""
+        game = self.game
+        return {"seed": game.seed, "frame": game.frame, "score": game.player_score, "kills": game.player_kills,
+                "zombies": len(game.zombies)}
+
+
+class VecEnv:
+    """A batch of environments stepped one after another in this process.
+
+    Environment i first plays seed + i. Every game that ends is replaced by
+    one seeded from replacement_seed onwards in steps of seed_step (by
+    default the seeds straight after the first games), and the last
+    observation of the finished game is put in its info as
+    "final_observation".
+    """
+
+    def __init__(self, num_envs, seed=0, replacement_seed=None, seed_step=1, **env_options):
+        self.envs = [ZombieEnv(**env_options) for _ in range(num_envs)]
+        self.seed = seed
+        self.replacement_seed = seed + num_envs if replacement_seed is None else replacement_seed
+        self.seed_step = seed_step
+        self.next_seed = self.replacement_seed
+        self.episodes = 0
+
+    def __len__(self):
+        return len(self.envs)
+
+    def reset(self):
+        """Start every game; returns (observations, infos)"""
+        self.next_seed = self.replacement_seed
+        results = [env.reset(self.seed + i) for i, env in enumerate(self.envs)]
+        return [obs for obs, _ in results], [info for _, info in results]
+
+    def step(self, actions):
+        """Play one action per environment; returns lists of (observation, reward, terminated, truncated, info)"""
+        observations, rewards, terminated, truncated, infos = [], [], [], [], []
+        for env, action in zip(self.envs, actions):
+            obs, reward, done, cut, info = env.step(action)
+            if done or cut:
+                info["final_observation"] = obs
+                obs, _ = env.reset(self.next_seed)
+                self.next_seed += self.seed_step
+                self.episodes += 1
+            observations.append(obs)
+            rewards.append(reward)
+            terminated.append(done)
+            truncated.append(cut)
+            infos.append(info)
+        return observations, rewards, terminated, truncated, infos
+
+    def close(self):
+        pass
+
+
+def _worker(conn, num_envs, seed, replacement_seed, seed_step, env_options):
+    """Run a VecEnv in a worker process, answering commands from the pipe"""
+    envs = VecEnv(num_envs, seed, replacement_seed, seed_step, **env_options)
+    try:
+        while True:
+            command, data = conn.recv()
+            if command == "reset":
+                conn.send(envs.reset())
+            elif command == "step":
+                conn.send(envs.step(data))
+            elif command == "episodes":
+                conn.send(envs.episodes)
+            elif command == "close":
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        conn.close()
+
+
+class ProcessVecEnv:
+    """A batch of environments split over worker processes that step in parallel.
+
+    Each worker runs a VecEnv over a contiguous slice of the batch. The first
+    games get the same seeds as in a single VecEnv; the seeds after those
+    are interleaved between the workers so none is played twice. Use as a
+    context manager, or call close(), to stop the workers.
+    """
+
+    def __init__(self, num_envs, processes=None, seed=0, **env_options):
+        processes = min(processes or os.cpu_count() or 1, num_envs)
+        self.num_envs = num_envs
+        self.slices = []
+        self.pipes = []
+        self.workers = []
+        start = 0
+        for i in range(processes):
+            count = num_envs // processes + (i < num_envs % processes)
+            self.slices.append((start, start + count))
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_worker, daemon=True,
+                                             args=(child, count, seed + start, seed + num_envs + i, processes,
+                                                   env_options))
+            worker.start()
+            child.close()
+            self.pipes.append(parent)
+            self.workers.append(worker)
+            start += count
+
+    def __len__(self):
+        return self.num_envs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def reset(self):
+        """Start every game; returns (observations, infos)"""
+        for pipe in self.pipes:
+            pipe.send(("reset", None))
+        observations, infos = [], []
+        for pipe in self.pipes:
+            obs, info = pipe.recv()
+            observations += obs
+            infos += info
+        return observations, infos
+
+    def step(self, actions):
+        """Play one action per environment; returns lists of (observation, reward, terminated, truncated, info)"""
+        for pipe, (start, end) in zip(self.pipes, self.slices):
+            pipe.send(("step", actions[start:end]))
+        results = [[], [], [], [], []]
+        for pipe in self.pipes:
+            for combined, part in zip(results, pipe.recv()):
+                combined += part
+        return tuple(results)
+
+    @property
+    def episodes(self):
+        """Number of games that have ended across every worker"""
+        for pipe in self.pipes:
+            pipe.send(("episodes", None))
+        return sum(pipe.recv() for pipe in self.pipes)
+
+    def close(self):
+        """Stop the workers"""
+        for pipe in self.pipes:
+            try:
+                pipe.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+            pipe.close()
+        for worker in self.workers:
+            worker.join(timeout=5)
+        self.pipes = []
+        self.workers = []
+
+
+# Policies
+
+def random_policy(observation, rng=random):
+    """Move, aim and fire at random"""
+    return rng.randint(-1, 1), rng.randint(-1, 1), rng.uniform(-math.pi, math.pi), rng.random() < 0.5, None
+
+
+def nearest_policy(observation, rng=random):
+    """Shoot the nearest zombie and back away from it, switching weapons when out of ammo"""
+    weapon = None
+    ammo = observation["ammo"]
+    if ammo[observation["weapon"]] == 0:
+        weapon = next((i for i, left in enumerate(ammo) if left > 0), None)
+    if not observation["zombies"]:
+        return 0, 0, observation["player"][6], False, weapon
+    dx, dy, _, _ = observation["zombies"][0]
+    return -_sign(dx), -_sign(dy), math.atan2(dy, dx), True, weapon
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+policies = {
+    "nearest": nearest_policy,
+    "random": random_policy
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how fast batches of Zombie Survival environments step")
+    parser.add_argument("--envs", type=int, default=16, help="number of games stepped together")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="worker processes to spread the games over (0 steps them all in this process)")
+    parser.add_argument("--steps", type=int, default=1000, help="batched steps to run")
+    parser.add_argument("--frame-skip", type=int, default=1, help="ticks each action is repeated for")
+    parser.add_argument("--max-ticks", type=int, default=None, help="truncate games after this many ticks")
+    parser.add_argument("--policy", choices=sorted(policies), default="nearest", help="who plays the games")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game; game i starts with seed + i")
+    parser.add_argument("--numpy", action="store_true", help="keep zombies and bullets in NumPy arrays")
+    args = parser.parse_args()
+
+    if args.numpy and not entity_arrays.available():
+        print("NumPy is not installed, using the list backend")
+
+    options = {"use_numpy": args.numpy, "frame_skip": args.frame_skip, "max_ticks": args.max_ticks}
+    if args.processes > 0:
+        envs = ProcessVecEnv(args.envs, args.processes, args.seed, **options)
+        where = f"{len(envs.workers)} processes"
+    else:
+        envs = VecEnv(args.envs, args.seed, **options)
+        where = "in process"
+
+    policy = policies[args.policy]
+    rng = random.Random(args.seed)
+    try:
+        observations, _ = envs.reset()
+        total_reward = 0
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            actions = [policy(obs, rng) for obs in observations]
+            observations, rewards, _, _, _ = envs.step(actions)
+            total_reward += sum(rewards)
+        elapsed = time.perf_counter() - start
+        episodes = envs.episodes
+    finally:
+        envs.close()
+
+    steps = args.steps * args.envs
+    print(f"{args.envs} envs {where}: {steps} steps in {elapsed:.2f}s, {steps / elapsed:.0f} steps/s "
+          f"({steps * args.frame_skip / elapsed:.0f} ticks/s), {episodes} games ended, "
+          f"mean reward {total_reward / steps:.2f} per step")
+
+
+if __name__ == "__main__":
+    main()
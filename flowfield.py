@@ -0,0 +1,275 @@
+"""Flow-field navigation towards the player around static obstacles.
+
+The world is divided into square cells, and cells overlapping an obstacle
+are blocked. A FlowField holds, for every cell in a square window around
+the goal, the direction of the next step on a shortest path to the goal.
+It is rebuilt only when the goal moves to another cell, so any number of
+zombies can steer by it for a lookup each.
+
+A build is a breadth-first search over whole sets of cells at once: each
+set is an int with one bit per cell of the window, so stepping every cell
+of a search front one cell sideways is a single shift.
+"""
+import math
+from collections import OrderedDict
+
+# Steps towards the goal as (dx, dy, cost); costs of 2 and 3 keep diagonal steps about sqrt(2) times as long
+steps = [(1, 0, 2), (-1, 0, 2), (0, 1, 2), (0, -1, 2), (1, 1, 3), (1, -1, 3), (-1, 1, 3), (-1, -1, 3)]
+
+
+def blocked_cells(obstacles, cell_size):
+    """Return the set of cells overlapped by any (x, y, radius) circle"""
+    blocked = set()
+    for ox, oy, radius in obstacles:
+        for cx in range(math.floor((ox - radius) / cell_size), math.floor((ox + radius) / cell_size) + 1):
+            for cy in range(math.floor((oy - radius) / cell_size), math.floor((oy + radius) / cell_size) + 1):
+                # Closest point of the cell to the circle's center
+                nearest_x = min(max(ox, cx * cell_size), (cx + 1) * cell_size)
+                nearest_y = min(max(oy, cy * cell_size), (cy + 1) * cell_size)
+                if math.hypot(nearest_x - ox, nearest_y - oy) < radius:
+                    blocked.add((cx, cy))
+    return blocked
+
+
+def shift(cells, offset):
+    """Return a cell set with bit i set where bit i + offset of cells is"""
+    return cells >> offset if offset >= 0 else cells << -offset
+
+
+def spread(cells):
+    """Return a cell set with bit i moved to hex digit i, so cell sets can be added without carries"""
+    return int(format(cells, "b"), 16)
+
+
+_rankings = {}
+
+
+def step_rankings(radius, width):
+    """Return ranked[r][s], the set of window cells whose r-th choice of step is step s.
+
+    A cell prefers the steps closest to the straight line to the goal at
+    the window's center. The rankings only depend on the window's shape, so
+    they are worked out once and shared.
+    """
+    key = (radius, width)
+    ranked = _rankings.get(key)
+    if ranked is None:
+        ranked = _rankings[key] = [[0] * len(steps) for _ in steps]
+        for y in range(-radius, radius + 1):
+            for x in range(-radius, radius + 1):
+                bit = 1 << ((y + radius + 1) * width + x + radius + 1)
+                order = sorted(range(len(steps)), key=lambda s: (steps[s][0] * x + steps[s][1] * y)
+                               / math.hypot(steps[s][0], steps[s][1]))
+                for rank, s in enumerate(order):
+                    ranked[rank][s] |= bit
+    return ranked
+
+
+class ChunkBlockedCells:
+    """The blocked cells of an unbounded world, worked out per chunk.
+
+    A chunk's blocked cells are found the first time a cell in it is looked
+    up, and kept as one int per row of cells, with bit x set where the x-th
+    cell of the row is blocked. Only the max_chunks most recently used
+    chunks are kept.
+    """
+
+    def __init__(self, get_obstacles, chunk_size, cell_size, max_chunks=64):
+        self.get_obstacles = get_obstacles  # (cx, cy) -> (x, y, radius) of the obstacles in a chunk
+        self.cells_per_chunk = chunk_size // cell_size
+        self.cell_size = cell_size
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (cx, cy) -> row bits of the chunk's blocked cells
+
+    def chunk_rows(self, cx, cy):
+        """Return the row bits of a chunk's blocked cells, working them out if needed"""
+        key = (cx, cy)
+        rows = self.chunks.get(key)
+        if rows is not None:
+            self.chunks.move_to_end(key)
+            return rows
+
+        # Obstacles just over the chunk's edge can block cells in it too
+        obstacles = [obstacle for nx in (cx - 1, cx, cx + 1) for ny in (cy - 1, cy, cy + 1)
+                     for obstacle in self.get_obstacles(nx, ny)]
+        per_chunk = self.cells_per_chunk
+        left = cx * per_chunk
+        top = cy * per_chunk
+        rows = [0] * per_chunk
+        for x, y in blocked_cells(obstacles, self.cell_size):
+            if 0 <= x - left < per_chunk and 0 <= y - top < per_chunk:
+                rows[y - top] |= 1 << (x - left)
+
+        self.chunks[key] = rows
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return rows
+
+    def row(self, x, y, width):
+        """Return the blocked cells of the width cells from cell (x, y) rightwards, as bits from bit 0"""
+        per_chunk = self.cells_per_chunk
+        cy, local_y = divmod(y, per_chunk)
+        bits = 0
+        done = 0
+        while done < width:
+            cx, local_x = divmod(x + done, per_chunk)
+            bits |= (self.chunk_rows(cx, cy)[local_y] >> local_x) << done
+            done += per_chunk - local_x
+        return bits & ((1 << width) - 1)
+
+
+class FlowField:
+    """Per-cell steering directions towards the goal over a window of cells.
+
+    The window is 2 * radius + 1 cells wide and centered on the goal's cell.
+    The fields for the last cache_size goal cells are kept, since the goal
+    (the player) often goes back and forth over the same few cells.
+    Cells are stored row by row; steer[i] is False where the caller should
+    head straight for the goal instead: where nothing is in the way, or where
+    the goal cannot be reached at all.
+    """
+
+    def __init__(self, blocked, cell_size=40, radius=16, cache_size=32):
+        self.blocked = blocked  # a ChunkBlockedCells
+        self.cell_size = cell_size
+        self.radius = radius
+        self.size = size = radius * 2 + 1
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # goal cell -> (origin, dir_x, dir_y, steer)
+        self.goal = None
+        self.origin = (0, 0)
+        self.dir_x = [0.0] * (size * size)
+        self.dir_y = [0.0] * (size * size)
+        self.steer = [False] * (size * size)
+
+        # Cell sets cover the window padded with a ring of cells, so that no
+        # step from a cell of the window wraps around to another row
+        self.width = width = size + 2
+        self.offsets = [dx + dy * width for dx, dy, _ in steps]
+        self.window = sum(((1 << size) - 1) << ((y + 1) * width + 1) for y in range(size))
+        self.start = 1 << ((radius + 1) * width + radius + 1)
+
+        # Where a cell has several steps onto a shortest path, it takes the best ranked
+        self.ranked = step_rankings(radius, width)
+
+        # Unit direction of each step by its hex digit in a built field
+        diagonal_length = math.sqrt(0.5)
+        self.step_dir_x = {"0": 0.0}
+        self.step_dir_y = {"0": 0.0}
+        for s, (dx, dy, _) in enumerate(steps):
+            scale = diagonal_length if dx and dy else 1.0
+            self.step_dir_x[format(s + 1, "x")] = dx * scale
+            self.step_dir_y[format(s + 1, "x")] = dy * scale
+
+    def update(self, goal_x, goal_y):
+        """Switch to the field for the goal's cell if it moved; returns True if it did"""
+        goal = (math.floor(goal_x / self.cell_size), math.floor(goal_y / self.cell_size))
+        if goal == self.goal:
+            return False
+        self.goal = goal
+        field = self.cache.get(goal)
+        if field is None:
+            field = self.cache[goal] = self._build()
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(goal)
+        self.origin, self.dir_x, self.dir_y, self.steer = field
+        return True
+
+    def blocked_window(self):
+        """Return the set of window cells that are blocked"""
+        ox = self.goal[0] - self.radius
+        oy = self.goal[1] - self.radius
+        width = self.width
+        blocked = 0
+        for y in range(self.size):
+            blocked |= self.blocked.row(ox, oy + y, self.size) << ((y + 1) * width + 1)
+        return blocked
+
+    def search(self, free, reaches=None):
+        """Return the cell sets at each distance from the goal over free cells.
+
+        Costs are whole numbers, so this is Dijkstra's algorithm with one
+        bucket per distance: cells at distance d are those a step of cost c
+        leads into from distance d - c, less those already reached. Given a
+        list of a cell set per step, it adds the cells for which that step
+        leads onto a shortest path.
+        """
+        width = self.width
+        # A diagonal step may not cut the corner of a blocked cell
+        moves = [(cost, offset, free if cost == 2 else free & shift(free, dx) & shift(free, dy * width))
+                 for (dx, dy, cost), offset in zip(steps, self.offsets)]
+        levels = [0, 0, self.start]  # two empty levels before the goal's, so levels[-cost] always exists
+        reached = self.start
+        while levels[-1] or levels[-2] or levels[-3]:
+            fronts = [(levels[-cost] >> offset if offset >= 0 else levels[-cost] << -offset) & allowed
+                      for cost, offset, allowed in moves]
+            level = 0
+            for front in fronts:
+                level |= front
+            level &= ~reached
+            reached |= level
+            if reaches is not None:
+                for s, front in enumerate(fronts):
+                    reaches[s] |= front & level
+            levels.append(level)
+        return levels[2:]
+
+    def _build(self):
+        """Search out from the goal cell and return (origin, dir_x, dir_y, steer)"""
+        window = self.window
+        blocked = self.blocked_window()
+        free = window & ~blocked | self.start
+        reaches = [0] * len(steps)
+        levels = self.search(free, reaches)
+
+        # Cells with a shortest path that keeps a cell away from obstacles can
+        # approach the goal directly, so they get no direction
+        near_obstacle = 0
+        for offset in self.offsets:
+            near_obstacle |= shift(blocked, offset)
+        clear_levels = self.search(free & ~near_obstacle | self.start)
+        open_path = 0
+        for level, clear_level in zip(levels, clear_levels):
+            open_path |= level & clear_level
+        steering = ~open_path
+
+        # Each steering cell takes its best ranked step onto a shortest path
+        chosen = [0] * len(steps)
+        for ranked in self.ranked:
+            taken = 0
+            for s, cells in enumerate(ranked):
+                cells &= reaches[s] & steering
+                chosen[s] |= cells
+                taken |= cells
+            steering &= ~taken
+
+        # Number every cell with its step (1-based, 0 for none) in one hex digit each
+        field = 0
+        for s, cells in enumerate(chosen):
+            field += spread(cells) * (s + 1)
+        width = self.width
+        text = format(field, f"0{width * width}x")[::-1]  # hex digit i is text[i]
+        codes = "".join(text[(y + 1) * width + 1:(y + 1) * width + 1 + self.size] for y in range(self.size))
+
+        step_dir_x = self.step_dir_x
+        step_dir_y = self.step_dir_y
+        origin = (self.goal[0] - self.radius, self.goal[1] - self.radius)
+        return origin, [step_dir_x[c] for c in codes], [step_dir_y[c] for c in codes], [c != "0" for c in codes]
+
+    def index(self, x, y):
+        """Return the window index of the cell containing a world position, or None outside the window"""
+        size = self.size
+        cx = math.floor(x / self.cell_size) - self.origin[0]
+        cy = math.floor(y / self.cell_size) - self.origin[1]
+        if 0 <= cx < size and 0 <= cy < size:
+            return cy * size + cx
+        return None
+
+    def direction(self, x, y):
+        """Return the unit steering vector at a world position, or None to head straight for the goal"""
+        i = self.index(x, y)
+        if i is None or not self.steer[i]:
+            return None
+        return self.dir_x[i], self.dir_y[i]
@@ -0,0 +1,755 @@
+"""Zombie survival simulation, free of any display, input or audio code.
+
+A Game advances in fixed ticks of tick_ms from an Inputs tuple, so speeds,
+cooldowns and damage are the same whatever the frame rate. All randomness
+comes from the game's own seeded Random, so a seed plus the inputs for every
+tick reproduce a run exactly. main2.py drives it from the keyboard and mouse
+and draws it with render.Renderer; headless.py drives it from a policy
+function as fast as the CPU allows.
+"""
+import math
+import random
+from collections import deque, namedtuple
+
+import entity_arrays
+from flowfield import ChunkBlockedCells, FlowField
+from obstacles import ObstacleIndex
+from pool import Pool, swap_remove
+from scheduler import Scheduler
+from spatial_hash import SpatialHash
+from timing import null_timer
+from world import World
+
+# Simulation rate (tick_ms is derived from it, see derive_settings())
+tick_rate = 60
+
+# Player setup
+player_size = 40
+player_start_x = 400
+player_start_y = 300
+player_base_speed = 5
+
+# Weapon setup; a bullet is used up after pierce hits (1 if not given), so adding
+# e.g. "pierce": 3 to the sniper lets each round pass through up to 3 zombies
+weapons = {
+    "pistol": {"damage": 25, "cooldown": 400, "bullet_speed": 8, "bullet_size": 5, "bullet_color": (255, 255, 0)},
+    "shotgun": {"damage": 15, "cooldown": 800, "bullet_speed": 7, "bullet_size": 4, "bullet_color": (255, 200, 0),
+                "spread": 5, "bullets": 5},
+    "rifle": {"damage": 40, "cooldown": 200, "bullet_speed": 12, "bullet_size": 3, "bullet_color": (255, 100, 0)},
+    "sniper": {"damage": 100, "cooldown": 1200, "bullet_speed": 20, "bullet_size": 7, "bullet_color": (200, 0, 200)}
+}
+weapons_list = ["pistol", "shotgun", "rifle", "sniper"]
+starting_ammo = {
+    "pistol": 100,
+    "shotgun": 20,
+    "rifle": 60,
+    "sniper": 10
+}
+bullet_range = 1000
+
+# Zombie setup
+# separation is how hard a zombie steers away from others closer than separation_radius
+zombie_types = {
+    "normal": {"size": 30, "speed": 2, "health": 50, "damage": 10, "color": (200, 0, 0), "xp": 10,
+               "separation": 0.6, "separation_radius": 30},
+    "fast": {"size": 25, "speed": 3.5, "health": 30, "damage": 5, "color": (150, 0, 0), "xp": 15,
+             "separation": 0.4, "separation_radius": 25},
+    "tank": {"size": 40, "speed": 1, "health": 150, "damage": 20, "color": (100, 0, 0), "xp": 25,
+             "separation": 1.0, "separation_radius": 40}
+}
+spawn_cooldown = 1000  # ms
+# first wave -> weights of normal, fast and tank for zombies spawned from that wave on
+spawn_weights = {1: [0.8, 0.15, 0.05], 6: [0.6, 0.3, 0.1], 11: [0.4, 0.4, 0.2], 16: [0.2, 0.5, 0.3]}
+
+# Simulation level of detail: a zombie up to distance away from the player moves
+# every interval ticks, interval steps at a time (staggered across zombies)
+zombie_lod = [(600, 1), (1000, 2), (math.inf, 4)]  # (distance, interval)
+wave_break_duration = 5000  # 5 seconds between waves
+wave_zombies_base = 10  # zombies in the first wave
+wave_zombies_growth = 3  # later waves have base + wave * growth
+wave_health_growth = 0.1  # zombie health is scaled by 1 + wave * growth
+
+max_separation_neighbors = 6  # others a zombie steers away from per push
+max_separation_candidates = 8  # others looked at per grid cell, to find those neighbors
+separation_interval = 3  # a zombie is pushed every interval ticks (staggered across zombies), that many ticks' worth
+
+# Map setup: an endless world generated in chunks of chunk_tiles x chunk_tiles tiles
+tile_size = 200
+chunk_tiles = 8
+max_world_chunks = 64  # generated chunks (and their collision data) kept in memory
+obstacle_radius = {"tree": 20, "rock": 15}  # objects that block movement and bullets; bushes are no obstacle
+obstacle_cell_size = 100
+
+# Zombie navigation: a flow field over cells of this size, nav_radius cells around the player
+nav_cell_size = 40
+nav_radius = 16
+
+# Powerups
+powerup_types = {
+    "health": {"color": (0, 255, 0), "size": 15, "effect": "heal", "value": 50},
+    "speed": {"color": (0, 255, 255), "size": 15, "effect": "speed", "value": 2, "duration": 10000},
+    "damage": {"color": (255, 0, 255), "size": 15, "effect": "damage", "value": 1.5, "duration": 15000},
+    "ammo": {"color": (255, 255, 255), "size": 15, "effect": "ammo",
+             "value": {"pistol": 50, "shotgun": 10, "rifle": 30, "sniper": 5}}
+}
+powerup_spawn_cooldown = 20000  # 20 seconds
+powerup_lifetime = 30000
+
+# Blood splatter effects
+blood_duration = 10000  # how long blood stays on ground
+
+# Settings computed from the ones above by derive_settings()
+derived_settings = ["tick_ms", "max_zombie_size", "max_bullet_size", "max_separation_radius", "collision_cell_size",
+                    "max_body_radius"]
+
+
+def derive_settings():
+    """Compute the derived settings; call again after changing the settings they come from.
+
+    Modules that imported a derived setting by name keep the old value.
+    """
+    global tick_ms, max_zombie_size, max_bullet_size, max_separation_radius, collision_cell_size, max_body_radius
+    tick_ms = 1000 / tick_rate
+
+    # Collision grid: a cell must be at least as wide as the largest contact distance
+    max_zombie_size = max(stats["size"] for stats in zombie_types.values())
+    max_bullet_size = max(weapon["bullet_size"] for weapon in weapons.values())
+    collision_cell_size = max(max_zombie_size + max_bullet_size, (player_size + max_zombie_size) / 2)
+
+    # Separation grid: cells as wide as the largest separation distance
+    max_separation_radius = max(stats["separation_radius"] for stats in zombie_types.values())
+
+    max_body_radius = max(player_size, max_zombie_size) / 2  # widest circle pushed out of obstacles
+
+
+derive_settings()
+
+# One tick of player input. move_x/move_y are -1, 0 or 1, aim_angle is in
+# radians, and weapon is the name of a weapon to switch to (or None).
+Inputs = namedtuple("Inputs", ["move_x", "move_y", "aim_angle", "fire", "weapon"])
+no_input = Inputs(0, 0, 0.0, False, None)
+
+
+def zombies_in_wave(wave):
+    """Return how many zombies have to be killed to clear a wave"""
+    if wave == 1:
+        return wave_zombies_base
+    return wave_zombies_base + wave * wave_zombies_growth
+
+
+def segment_hit_time(x0, y0, x1, y1, radius, from_inside):
+    """Return when (0 to 1) a point moving from (x0, y0) to (x1, y1) enters a circle at the origin.
+
+    A point that starts inside the circle hits it at 0 if from_inside is
+    set, and otherwise not at all (it is on its way out). Returns None if
+    the circle is not entered.
+    """
+    c = x0 * x0 + y0 * y0 - radius * radius
+    if c < 0:
+        return 0.0 if from_inside else None
+    dx = x1 - x0
+    dy = y1 - y0
+    a = dx * dx + dy * dy
+    if a == 0:
+        return None
+    b = x0 * dx + y0 * dy
+    discriminant = b * b - a * c
+    if b >= 0 or discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / a
+    return t if t <= 1 else None
+
+
+def generate_tile(rng, x, y):
+    """Create the random terrain and objects of the tile with its top-left corner at (x, y)"""
+    # Create random terrain (0=grass, 1=dirt, 2=sand)
+    tile = {
+        "type": rng.randint(0, 2),
+        "objects": []
+    }
+
+    # Add random objects (trees, rocks, etc)
+    if rng.random() < 0.3:
+        obj_type = rng.choice(["tree", "rock", "bush"])
+        obj_x = x + rng.randint(20, tile_size - 20)
+        obj_y = y + rng.randint(20, tile_size - 20)
+        tile["objects"].append({"type": obj_type, "x": obj_x, "y": obj_y})
+    return tile
+
+
+def generate_map(seed):
+    """Return the endless World for a map seed; nothing is generated until it is looked at"""
+    return World(seed, generate_tile, tile_size, chunk_tiles, max_world_chunks)
+
+
+def map_obstacles(map_tiles):
+    """Return (x, y, radius) for every object in a {(x, y): tile} dict that blocks movement"""
+    return [(obj["x"], obj["y"], obstacle_radius[obj["type"]])
+            for tile in map_tiles.values() for obj in tile["objects"] if obj["type"] in obstacle_radius]
+
+
+class Game:
+    """State of one run, advanced by step()"""
+
+    def __init__(self, world, seed=None, use_numpy=False):
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.world = world
+        self.use_numpy = use_numpy and entity_arrays.available()
+        self.zombie_grid = SpatialHash(collision_cell_size)
+        self.separation_grid = SpatialHash(max_separation_radius)
+        self.obstacles = ObstacleIndex(self.chunk_obstacles, world.chunk_size, obstacle_cell_size, max_body_radius,
+                                       max_world_chunks)
+        self.flow_field = FlowField(ChunkBlockedCells(self.chunk_obstacles, world.chunk_size, nav_cell_size,
+                                                      max_world_chunks), nav_cell_size, nav_radius)
+
+        self.player_x, self.player_y = self.obstacles.push_out(player_start_x, player_start_y, player_size / 2)
+        self.prev_player_x = self.player_x
+        self.prev_player_y = self.player_y
+        self.player_speed = player_base_speed
+        self.player_health = 100
+        self.player_max_health = 100
+        self.player_score = 0
+        self.player_kills = 0
+        self.player_level = 1
+        self.player_xp = 0
+        self.player_xp_to_level = 100
+        self.player_damage = 25
+        self.damage_taken = 0
+        self.aim_angle = 0.0
+
+        self.current_weapon = "pistol"
+        self.ammo = dict(starting_ammo)
+        self.last_shot_time = 0
+
+        # Entries are reused through pools; the list backend removes zombies
+        # and bullets by swapping the last entry into the gap
+        self.zombie_pool = Pool(7, 512)
+        self.bullet_pool = Pool(9, 256)
+        self.powerup_pool = Pool(4, 32)
+        self.blood_pool = Pool(4, 4096)
+        if self.use_numpy:
+            self.zombies = entity_arrays.ZombieArrays(zombie_types)
+            self.bullets = entity_arrays.BulletArrays()
+        else:
+            self.zombies = []  # [x, y, speed, health, type, prev_x, prev_y]
+            self.bullets = []  # [x, y, dx, dy, damage, radius, color, hits left, frame fired]
+        self.zombie_steps = []  # ticks each zombie moved by in the last tick (list backend)
+        # Powerups and blood are created in time order, so the oldest are at the front
+        self.powerups = deque()  # [x, y, type, spawn time]
+        self.active_powerups = []  # [type, end_time, value]
+        self.blood_splatters = deque()  # [x, y, size, time]
+
+        self.wave = 1
+        self.zombies_per_wave = zombies_in_wave(1)
+        self.zombies_killed_in_wave = 0
+        self.wave_cleared = False
+        self.wave_start_time = 0
+        self.wave_began = 0
+        self.wave_times = []  # ms each cleared wave took, from its start to its last kill
+
+        # Timers: wave breaks, spawn cooldowns, powerup spawns and expiry
+        self.scheduler = Scheduler()
+        self.spawn_ready = False
+        self.scheduler.schedule(self.spawn_cooldown(), self.allow_spawn)
+        self.scheduler.schedule(powerup_spawn_cooldown, self.spawn_timed_powerup)
+
+        self.time = 0  # simulated ms since the game started
+        self.frame = 0  # ticks simulated so far
+        self.over = False
+        self.events = []  # sounds to play for the last tick: "shoot", "hit", "hurt", "powerup"
+        self.timer = null_timer  # a timing.PhaseTimer to time the phases of step()
+
+    def chunk_obstacles(self, cx, cy):
+        """Return (x, y, radius) for every obstacle in a world chunk"""
+        return map_obstacles(self.world.chunk(cx, cy))
+
+    def spawn_zombie(self):
+        """Spawn a zombie at the edge of the visible area"""
+        # Determine zombie type based on wave difficulty
+        weights = spawn_weights[max(first for first in spawn_weights if first <= self.wave)]
+
+        zombie_type = self.rng.choices(["normal", "fast", "tank"], weights=weights)[0]
+
+        # Spawn distance from player
+        min_distance = 400
+        max_distance = 600
+
+        angle = self.rng.uniform(0, 2 * math.pi)
+        distance = self.rng.uniform(min_distance, max_distance)
+
+        # Get zombie stats from type
+        stats = zombie_types[zombie_type]
+
+        zombie_x, zombie_y = self.obstacles.push_out(self.player_x + math.cos(angle) * distance,
+                                                     self.player_y + math.sin(angle) * distance, stats["size"] / 2)
+
+        # Scale health based on wave
+        health_scale = 1 + (self.wave * wave_health_growth)
+
+        self.add_zombie(zombie_x, zombie_y, stats["speed"], stats["health"] * health_scale, zombie_type)
+
+    def add_zombie(self, x, y, speed, health, zombie_type):
+        """Add a zombie to the game"""
+        if self.use_numpy:
+            self.zombies.append((x, y, speed, health, zombie_type, x, y))
+        else:
+            self.zombies.append(self.zombie_pool.acquire(x, y, speed, health, zombie_type, x, y))
+
+    def spawn_powerup(self):
+        """Spawn a random powerup near the player"""
+        powerup_type = self.rng.choice(list(powerup_types.keys()))
+        distance = self.rng.uniform(100, 300)
+        angle = self.rng.uniform(0, 2 * math.pi)
+
+        powerup_x = self.player_x + math.cos(angle) * distance
+        powerup_y = self.player_y + math.sin(angle) * distance
+
+        self.powerups.append(self.powerup_pool.acquire(powerup_x, powerup_y, powerup_type, self.time))
+
+    def process_level_up(self):
+        """Handle player level up"""
+        self.player_level += 1
+        self.player_xp -= self.player_xp_to_level
+        self.player_xp_to_level = 100 * self.player_level
+
+        # Improve player stats
+        self.player_max_health += 10
+        self.player_health = self.player_max_health  # Heal on levelup
+        self.player_damage *= 1.1  # 10% damage increase
+
+    def kill_zombie(self, zx, zy, ztype):
+        """Award score and XP for a killed zombie and leave blood and loot behind"""
+        now = self.time
+        self.player_score += zombie_types[ztype]["xp"] * self.wave
+        self.player_xp += zombie_types[ztype]["xp"]
+        self.zombies_killed_in_wave += 1
+        self.player_kills += 1
+
+        # Create death blood splatter
+        for _ in range(5):
+            offset_x = self.rng.randint(-20, 20)
+            offset_y = self.rng.randint(-20, 20)
+            self.blood_splatters.append(self.blood_pool.acquire(zx + offset_x, zy + offset_y,
+                                                                self.rng.randint(10, 25), now))
+
+        # Small chance to drop powerup on death
+        if self.rng.random() < 0.1:
+            self.powerups.append(self.powerup_pool.acquire(zx, zy, self.rng.choice(list(powerup_types.keys())), now))
+
+    def update_player_speed(self):
+        """Apply the speed powerup, if one is active"""
+        self.player_speed = player_base_speed
+        for ptype, _, value in self.active_powerups:
+            if ptype == "speed":
+                self.player_speed = player_base_speed * value
+
+    def expire_powerup(self, powerup):
+        """End a timed powerup effect"""
+        self.active_powerups.remove(powerup)
+        self.update_player_speed()
+
+    def spawn_cooldown(self):
+        """Return the time between zombie spawns, which shrinks in later waves"""
+        return max(200, spawn_cooldown - self.wave * 50)
+
+    def allow_spawn(self):
+        """Let the next zombie spawn once the wave has room for it"""
+        self.spawn_ready = True
+
+    def spawn_timed_powerup(self):
+        """Spawn the regular powerup and schedule the next one"""
+        self.spawn_powerup()
+        self.scheduler.schedule(self.time + powerup_spawn_cooldown, self.spawn_timed_powerup)
+
+    def start_next_wave(self):
+        """End the break between waves"""
+        self.wave += 1
+        self.zombies_per_wave = zombies_in_wave(self.wave)
+        self.wave_began = self.time
+        self.wave_cleared = False
+        self.zombies_killed_in_wave = 0
+        self.spawn_powerup()  # Spawn powerup at start of new wave
+
+    def step(self, inputs):
+        """Advance the game by one tick"""
+        self.time += tick_ms
+        self.frame += 1
+        self.events = []
+        now = self.time
+        timer = self.timer
+
+        if inputs.weapon is not None:
+            self.current_weapon = inputs.weapon
+        timer.lap("input")
+
+        # Run the timers that have come due (powerup expiry, wave breaks, spawning)
+        self.scheduler.run_due(now)
+        timer.lap("timers")
+        self.update_wave()
+        timer.lap("spawn")
+
+        # Movement
+        self.prev_player_x = self.player_x
+        self.prev_player_y = self.player_y
+        self.player_x, self.player_y = self.obstacles.push_out(self.player_x + inputs.move_x * self.player_speed,
+                                                               self.player_y + inputs.move_y * self.player_speed,
+                                                               player_size / 2)
+
+        # Aim and shoot
+        self.aim_angle = inputs.aim_angle
+        if inputs.fire:
+            self.fire()
+        timer.lap("input")
+
+        self.update_bullets()
+        timer.lap("bullets")
+
+        # Spawn zombies if the cooldown is over, the wave is active and we're below the spawn limit
+        if (self.spawn_ready and not self.wave_cleared and len(self.zombies) < max(5, self.wave * 2)
+                and self.zombies_killed_in_wave < self.zombies_per_wave):
+            self.spawn_ready = False
+            self.spawn_zombie()
+            self.scheduler.schedule(now + self.spawn_cooldown(), self.allow_spawn)
+        timer.lap("spawn")
+
+        self.update_zombies()
+        timer.lap("zombies")
+
+        self.collide_bullets()
+        timer.lap("collision")
+
+        # Check for level up
+        if self.player_xp >= self.player_xp_to_level:
+            self.process_level_up()
+
+        self.collect_powerups()
+        timer.lap("powerup_pickup")
+
+        # Remove old blood splatters
+        blood_splatters = self.blood_splatters
+        while blood_splatters and now - blood_splatters[0][3] >= blood_duration:
+            self.blood_pool.release(blood_splatters.popleft())
+        timer.lap("blood")
+
+        # Check game over condition
+        if self.player_health <= 0:
+            self.over = True
+
+    def update_wave(self):
+        """End the current wave once it is cleared and schedule the next one"""
+        if self.wave_cleared:
+            return
+        if self.zombies_killed_in_wave >= self.zombies_per_wave and len(self.zombies) == 0:
+            now = self.time
+            self.wave_cleared = True
+            self.wave_start_time = now
+            self.wave_times.append(now - self.wave_began)
+            self.player_score += self.wave * 100  # Bonus for clearing wave
+            self.scheduler.schedule(now + wave_break_duration, self.start_next_wave)
+
+    def fire(self):
+        """Shoot the current weapon along the aim angle if it is ready"""
+        now = self.time
+        weapon = weapons[self.current_weapon]
+        if now - self.last_shot_time <= weapon["cooldown"] or self.ammo[self.current_weapon] <= 0:
+            return
+        self.last_shot_time = now
+        self.ammo[self.current_weapon] -= 1
+
+        # Shotgun shoots multiple bullets in a spread
+        if self.current_weapon == "shotgun":
+            angles = [self.aim_angle + self.rng.uniform(-0.15, 0.15) for _ in range(weapon["bullets"])]
+        else:
+            angles = [self.aim_angle]
+
+        for angle in angles:
+            dir_x = math.cos(angle)
+            dir_y = math.sin(angle)
+            bullet = (
+                self.player_x, self.player_y,
+                dir_x * weapon["bullet_speed"],
+                dir_y * weapon["bullet_speed"],
+                weapon["damage"] * self.player_damage / 100,
+                weapon["bullet_size"],
+                weapon["bullet_color"],
+                weapon.get("pierce", 1),
+                self.frame
+            )
+            if self.use_numpy:
+                self.bullets.append(bullet)
+            else:
+                self.bullets.append(self.bullet_pool.acquire(*bullet))
+
+        self.events.append("shoot")
+
+    def update_bullets(self):
+        """Move bullets and drop the ones that are too far from the player or hit an obstacle"""
+        obstacles = self.obstacles
+        if self.use_numpy:
+            self.bullets.advance()
+            self.bullets.cull(self.player_x, self.player_y, bullet_range, obstacles)
+            return
+
+        bullets = self.bullets
+        px, py = self.player_x, self.player_y
+        for i in range(len(bullets) - 1, -1, -1):
+            bullet = bullets[i]
+            bullet[0] += bullet[2]  # x += dx
+            bullet[1] += bullet[3]  # y += dy
+            if (math.hypot(bullet[0] - px, bullet[1] - py) >= bullet_range
+                    or obstacles.blocks(bullet[0], bullet[1], bullet[5])):
+                self.bullet_pool.release(swap_remove(bullets, i))
+
+    def update_zombies(self):
+        """Move zombies towards the player and apply contact damage"""
+        px, py = self.player_x, self.player_y
+        field = self.flow_field
+        field.update(px, py)
+        if self.use_numpy:
+            steps = self.zombies.seek(px, py, field, zombie_lod, self.frame)
+            self.zombies.separate(max_separation_radius, max_separation_neighbors, max_separation_candidates, steps,
+                                  separation_interval, self.frame)
+            self.zombies.push_out(self.obstacles, steps)
+
+            # Check collision with player
+            for damage in self.zombies.contact_damage(px, py, player_size / 2):
+                damage /= 10  # Damage per tick
+                self.player_health -= damage
+                self.damage_taken += damage
+                if self.rng.random() < 0.1:  # Don't play sound every tick
+                    self.events.append("hurt")
+            return
+
+        # Ticks each zombie moves by this tick: 0 for distant zombies that skip it
+        frame = self.frame
+        steps = self.zombie_steps = []
+        for i, zombie in enumerate(self.zombies):
+            zombie[5] = zombie[0]
+            zombie[6] = zombie[1]
+
+            dir_x = px - zombie[0]
+            dir_y = py - zombie[1]
+            length = math.hypot(dir_x, dir_y)
+            for distance, interval in zombie_lod:
+                if length <= distance:
+                    break
+            if (frame + i) % interval:
+                steps.append(0)
+                continue
+            steps.append(interval)
+
+            # Follow the flow field around obstacles, or head straight for the player near it
+            steer = field.direction(zombie[0], zombie[1])
+            if steer is not None:
+                dir_x, dir_y = steer
+            elif length != 0:
+                dir_x /= length
+                dir_y /= length
+
+            zombie[0] += dir_x * zombie[2] * interval
+            zombie[1] += dir_y * zombie[2] * interval
+
+        # Keep crowds apart
+        self.separation_grid.rebuild(self.zombies)
+        self.separate_zombies()
+
+        # Keep zombies out of trees and rocks
+        obstacles = self.obstacles
+        for zombie, step in zip(self.zombies, steps):
+            if step:
+                zombie[0], zombie[1] = obstacles.push_out(zombie[0], zombie[1], zombie_types[zombie[4]]["size"] / 2)
+
+        # Index zombies where they ended up for collision queries
+        self.zombie_grid.rebuild(self.zombies)
+
+        # Check collision with player
+        for i in sorted(self.zombie_grid.query(px, py)):
+            zombie = self.zombies[i]
+            if math.hypot(px - zombie[0], py - zombie[1]) < player_size / 2 + zombie_types[zombie[4]]["size"] / 2:
+                damage = zombie_types[zombie[4]]["damage"] / 10  # Damage per tick
+                self.player_health -= damage
+                self.damage_taken += damage
+                if self.rng.random() < 0.1:  # Don't play sound every tick
+                    self.events.append("hurt")
+
+    def separate_zombies(self):
+        """Push zombies that crowd each other apart, boid-style.
+
+        Each zombie steers away from the first max_separation_neighbors
+        others within its type's separation radius. They are looked for
+        among the first max_separation_candidates zombies of its grid cell
+        and then of the cells around it, nearest cells first, so no zombie
+        looks at more than that many others however dense the crowd.
+        Candidates are gathered once per cell for all the zombies in it,
+        and all pushes are worked out before any zombie moves. A zombie is
+        only pushed every separation_interval ticks, and distant zombies
+        only on the ticks they move (see zombie_lod).
+        """
+        zombies = self.zombies
+        steps = self.zombie_steps
+        frame = self.frame
+        cells = self.separation_grid.cells
+        pushes = []
+        for (cx, cy), members in cells.items():
+            movers = [i for i in members if steps[i] and (frame + i) % separation_interval == 0]
+            if not movers:
+                continue
+            candidates = []
+            for dx, dy in entity_arrays.separation_cells:
+                cell = cells.get((cx + dx, cy + dy))
+                if cell:
+                    candidates.extend(cell[:max_separation_candidates - len(candidates)])
+                    if len(candidates) == max_separation_candidates:
+                        break
+            candidates = [(j, zombies[j][0], zombies[j][1]) for j in candidates]
+
+            for i in movers:
+                step = steps[i]
+                zombie = zombies[i]
+                x, y = zombie[0], zombie[1]
+                stats = zombie_types[zombie[4]]
+                radius = stats["separation_radius"]
+                push_x = push_y = 0.0
+                found = 0
+                for j, other_x, other_y in candidates:
+                    if j == i:
+                        continue
+                    dx = x - other_x
+                    dy = y - other_y
+                    dist_sq = dx * dx + dy * dy
+                    if dist_sq >= radius * radius:
+                        continue
+                    if dist_sq == 0:
+                        # Exactly on top of each other: split along a fixed direction per zombie
+                        dx, dy, dist = math.cos(i), math.sin(i), 1.0
+                    else:
+                        dist = math.sqrt(dist_sq)
+                    strength = 1 - dist / radius
+                    push_x += dx / dist * strength
+                    push_y += dy / dist * strength
+                    found += 1
+                    if found == max_separation_neighbors:
+                        break
+                if not found:
+                    continue
+
+                # A push never moves a zombie further than it moves in the ticks it stands for
+                reach = zombie[2] * step * separation_interval
+                push_x *= stats["separation"] * reach
+                push_y *= stats["separation"] * reach
+                length = math.hypot(push_x, push_y)
+                if length > reach:
+                    push_x *= reach / length
+                    push_y *= reach / length
+                pushes.append((zombie, push_x, push_y))
+
+        for zombie, push_x, push_y in pushes:
+            zombie[0] += push_x
+            zombie[1] += push_y
+
+    def collide_bullets(self):
+        """Apply bullet hits to zombies and remove spent bullets and dead zombies"""
+        now = self.time
+        if self.use_numpy:
+            hits, killed = entity_arrays.collide_bullets(self.zombies, self.bullets, collision_cell_size, self.frame)
+            for bx, by in hits:
+                # Create blood splatter
+                self.blood_splatters.append(self.blood_pool.acquire(bx, by, self.rng.randint(5, 15), now))
+                self.events.append("hit")
+
+            for zx, zy, ztype in killed:
+                self.kill_zombie(zx, zy, ztype)
+            return
+
+        # Each bullet is swept along its path for the tick, relative to each
+        # nearby zombie's own movement, and hits the first zombies it enters
+        frame = self.frame
+        zombies = self.zombies
+        bullets = self.bullets
+        bullet_hits = {}
+        for j, bullet in enumerate(bullets):
+            bx, by, dx, dy, _, bradius, _, hits_left, fired = bullet
+            start_x = bx - dx
+            start_y = by - dy
+            hits = []
+            for i in self.zombie_grid.query_segment(start_x, start_y, bx, by):
+                zx, zy, _, _, ztype, prev_x, prev_y = zombies[i]
+                t = segment_hit_time(start_x - prev_x, start_y - prev_y, bx - zx, by - zy,
+                                     zombie_types[ztype]["size"] / 2 + bradius, fired == frame)
+                if t is not None:
+                    hits.append((t, i))
+
+            # Piercing bullets go through several zombies, nearest along the path first
+            hits.sort()
+            for t, i in hits[:hits_left]:
+                bullet_hits.setdefault(i, []).append((j, start_x + dx * t, start_y + dy * t))
+
+        if not bullet_hits:
+            return
+
+        spent = []
+        dead = []
+        for i in sorted(bullet_hits):
+            zombie = zombies[i]
+            for j, hit_x, hit_y in bullet_hits[i]:
+                bullet = bullets[j]
+                zombie[3] -= bullet[4]
+                bullet[7] -= 1
+                if bullet[7] == 0:
+                    spent.append(j)
+
+                # Create blood splatter
+                self.blood_splatters.append(self.blood_pool.acquire(hit_x, hit_y, self.rng.randint(5, 15), now))
+                self.events.append("hit")
+
+            if zombie[3] <= 0:
+                self.kill_zombie(zombie[0], zombie[1], zombie[4])
+                dead.append(i)
+
+        # Remove from the back so the entries swapped into the gaps are ones already kept
+        for j in sorted(spent, reverse=True):
+            self.bullet_pool.release(swap_remove(bullets, j))
+        for i in reversed(dead):
+            self.zombie_pool.release(swap_remove(zombies, i))
+
+    def pool_stats(self):
+        """Return the usage counters of every entity pool"""
+        return {"zombies": self.zombie_pool.stats(), "bullets": self.bullet_pool.stats(),
+                "powerups": self.powerup_pool.stats(), "blood": self.blood_pool.stats()}
+
+    def collect_powerups(self):
+        """Apply powerups the player touches and drop expired ones"""
+        now = self.time
+        touched = [powerup for powerup in self.powerups
+                   if math.hypot(self.player_x - powerup[0], self.player_y - powerup[1])
+                   < player_size / 2 + powerup_types[powerup[2]]["size"]]
+        for powerup in touched:
+            ptype = powerup[2]
+            self.powerups.remove(powerup)
+            self.powerup_pool.release(powerup)
+
+            # Apply powerup effect
+            if ptype == "health":
+                self.player_health = min(self.player_max_health,
+                                         self.player_health + powerup_types[ptype]["value"])
+            elif ptype == "ammo":
+                for weapon, amount in powerup_types[ptype]["value"].items():
+                    self.ammo[weapon] += amount
+            else:
+                # Timed powerups
+                duration = powerup_types[ptype]["duration"]
+                value = powerup_types[ptype]["value"]
+                active = [ptype, now + duration, value]
+                self.active_powerups.append(active)
+                self.scheduler.schedule(active[1], self.expire_powerup, active)
+                self.update_player_speed()
+
+            self.events.append("powerup")
+
+        # Powerups last 30 seconds
+        powerups = self.powerups
+        while powerups and now - powerups[0][3] >= powerup_lifetime:
+            self.powerup_pool.release(powerups.popleft())
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, color)"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def render(self, font, text, color):
+        """Return the rendered surface for a string, rendering it on first use"""
+        key = (id(font), text, color)
+        surface = self.entries.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.entries[key] = surface
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return surface
+
+
+_panels = {}
+
+
+def panel_surface(size, color):
+    """Return a shared translucent background surface of a size and RGBA color"""
+    key = (size, color)
+    surface = _panels.get(key)
+    if surface is None:
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        surface.fill(color)
+        _panels[key] = surface
+    return surface
+
+
+class TextWidget:
+    """Text built from a format string; re-rendered only when its values change.
+
+    anchor is "topleft" or "midtop" (pos is then the center of the top edge).
+    """
+
+    def __init__(self, text_cache, font, fmt, pos, color=(255, 255, 255), anchor="topleft"):
+        self.text_cache = text_cache
+        self.font = font
+        self.fmt = fmt
+        self.pos = pos
+        self.color = color
+        self.anchor = anchor
+        self.values = None
+        self.surface = None
+        self.dest = pos
+        self.visible = True
+
+    def update(self, *values, color=None):
+        """Bind new values (and optionally a color) to the widget"""
+        color = color or self.color
+        if values == self.values and color == self.color and self.surface is not None:
+            return
+        self.values = values
+        self.color = color
+        self.surface = self.text_cache.render(self.font, self.fmt.format(*values), color)
+        if self.anchor == "midtop":
+            self.dest = (self.pos[0] - self.surface.get_width() // 2, self.pos[1])
+
+
+class PanelWidget:
+    """Translucent background rectangle; switching color swaps cached surfaces"""
+
+    def __init__(self, size, pos, color=(0, 0, 0, 150)):
+        self.size = size
+        self.dest = pos
+        self.visible = True
+        self.surface = panel_surface(size, color)
+
+    def update(self, color):
+        """Use the background surface for another color"""
+        self.surface = panel_surface(self.size, color)
+
+
+class BarWidget:
+    """Two-tone progress bar redrawn only when its filled width changes"""
+
+    def __init__(self, size, pos, back_color, fill_color):
+        self.size = size
+        self.dest = pos
+        self.back_color = back_color
+        self.fill_color = fill_color
+        self.visible = True
+        self.filled = None
+        self.surface = pygame.Surface(size)
+
+    def update(self, ratio):
+        """Set the filled fraction of the bar"""
+        width, height = self.size
+        filled = max(0, min(width, int(width * ratio)))
+        if filled == self.filled:
+            return
+        self.filled = filled
+        self.surface.fill(self.back_color)
+        self.surface.fill(self.fill_color, (0, 0, filled, height))
+
+
+class Hud:
+    """Named widgets composited in insertion order with one Surface.blits call"""
+
+    def __init__(self, text_cache=None):
+        self.text_cache = text_cache or TextCache()
+        self.widgets = OrderedDict()
+
+    def text(self, name, font, fmt, pos, color=(255, 255, 255), anchor="topleft"):
+        """Add a text widget"""
+        widget = self.widgets[name] = TextWidget(self.text_cache, font, fmt, pos, color, anchor)
+        return widget
+
+    def panel(self, name, size, pos, color=(0, 0, 0, 150)):
+        """Add a translucent background panel"""
+        widget = self.widgets[name] = PanelWidget(size, pos, color)
+        return widget
+
+    def bar(self, name, size, pos, back_color, fill_color):
+        """Add a progress bar"""
+        widget = self.widgets[name] = BarWidget(size, pos, back_color, fill_color)
+        return widget
+
+    def __getitem__(self, name):
+        return self.widgets[name]
+
+    def show(self, name, visible=True):
+        """Show or hide a widget"""
+        self.widgets[name].visible = visible
+
+    def draw(self, surface):
+        """Blit every visible widget"""
+        surface.blits([(widget.surface, widget.dest) for widget in self.widgets.values()
+                       if widget.visible and widget.surface is not None], doreturn=False)
@@ -0,0 +1,85 @@
+"""Static collision against the map's trees and rocks.
+
+Obstacles never move, so they are bucketed into a grid whose cells list
+every obstacle that a circle (up to max_radius wide) centered in the cell
+could overlap. Resolving an entity is then one dict lookup and a distance
+test against the one or two obstacles nearby. The grid is built one world
+chunk at a time, the first time an entity enters the chunk, and only the
+max_chunks most recently used chunks are kept.
+"""
+import math
+from collections import OrderedDict
+
+
+class ObstacleIndex:
+    """Broad-phase grid of static (x, y, radius) circles, built per world chunk"""
+
+    def __init__(self, get_obstacles, chunk_size, cell_size=100, max_radius=20, max_chunks=64):
+        self.get_obstacles = get_obstacles  # (cx, cy) -> (x, y, radius) of the obstacles in a chunk
+        self.chunk_size = chunk_size
+        self.cell_size = cell_size
+        self.cells_per_chunk = chunk_size // cell_size
+        self.max_radius = max_radius
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (cx, cy) -> {cell: obstacles}
+
+    def chunk_cells(self, cx, cy):
+        """Return the {cell: obstacles} of the cells in a chunk that have any"""
+        key = (cx, cy)
+        cells = self.chunks.get(key)
+        if cells is not None:
+            self.chunks.move_to_end(key)
+            return cells
+
+        # Obstacles just over the chunk's edge can reach into it too
+        cell_size = self.cell_size
+        first_x = cx * self.cells_per_chunk
+        first_y = cy * self.cells_per_chunk
+        last_x = first_x + self.cells_per_chunk - 1
+        last_y = first_y + self.cells_per_chunk - 1
+        found = {}
+        for nx in (cx - 1, cx, cx + 1):
+            for ny in (cy - 1, cy, cy + 1):
+                for obstacle in self.get_obstacles(nx, ny):
+                    ox, oy, radius = obstacle
+                    reach = radius + self.max_radius
+                    for gx in range(max(first_x, math.floor((ox - reach) / cell_size)),
+                                    min(last_x, math.floor((ox + reach) / cell_size)) + 1):
+                        for gy in range(max(first_y, math.floor((oy - reach) / cell_size)),
+                                        min(last_y, math.floor((oy + reach) / cell_size)) + 1):
+                            # Closest point of the cell to the obstacle's center
+                            nearest_x = min(max(ox, gx * cell_size), (gx + 1) * cell_size)
+                            nearest_y = min(max(oy, gy * cell_size), (gy + 1) * cell_size)
+                            if math.hypot(nearest_x - ox, nearest_y - oy) < reach:
+                                found.setdefault((gx, gy), []).append(obstacle)
+        cells = self.chunks[key] = {cell: tuple(obstacles) for cell, obstacles in found.items()}
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return cells
+
+    def near(self, x, y):
+        """Return the obstacles a circle centered at (x, y) could overlap"""
+        gx = math.floor(x / self.cell_size)
+        gy = math.floor(y / self.cell_size)
+        return self.chunk_cells(gx // self.cells_per_chunk, gy // self.cells_per_chunk).get((gx, gy), ())
+
+    def push_out(self, x, y, radius):
+        """Return a circle's center moved out of any obstacle it overlaps"""
+        for ox, oy, obstacle_radius in self.near(x, y):
+            dx = x - ox
+            dy = y - oy
+            dist = math.hypot(dx, dy)
+            overlap = obstacle_radius + radius - dist
+            if overlap > 0:
+                if dist == 0:
+                    dx, dy, dist = 1.0, 0.0, 1.0
+                x += dx / dist * overlap
+                y += dy / dist * overlap
+        return x, y
+
+    def blocks(self, x, y, radius):
+        """Return True if a circle overlaps an obstacle"""
+        for ox, oy, obstacle_radius in self.near(x, y):
+            if math.hypot(x - ox, y - oy) < obstacle_radius + radius:
+                return True
+        return False
@@ -0,0 +1,50 @@
+class Pool:
+    """Free list of entry lists that are reused instead of reallocated.
+
+    Up to capacity released entries are kept for reuse. acquire() only
+    allocates when the free list is empty, which is counted in misses.
+    """
+
+    def __init__(self, fields, capacity):
+        self.fields = fields
+        self.capacity = capacity
+        self.free = [[None] * fields for _ in range(capacity)]
+        self.in_use = 0
+        self.high_water = 0
+        self.misses = 0
+
+    def acquire(self, *values):
+        """Return an entry holding values, reusing a released one if possible"""
+        if self.free:
+            entry = self.free.pop()
+        else:
+            entry = [None] * self.fields
+            self.misses += 1
+        entry[:] = values
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return entry
+
+    def release(self, entry):
+        """Hand an entry back once nothing refers to it any more"""
+        self.in_use -= 1
+        if len(self.free) < self.capacity:
+            self.free.append(entry)
+
+    def stats(self):
+        """Return the pool's usage counters"""
+        return {"in_use": self.in_use, "high_water": self.high_water, "capacity": self.capacity,
+                "misses": self.misses}
+
+
+def swap_remove(items, index):
+    """Remove and return items[index] by moving the last item into its place.
+
+    Order is not preserved; when removing while iterating, walk backwards.
+    """
+    item = items[index]
+    last = items.pop()
+    if index < len(items):
+        items[index] = last
+    return item
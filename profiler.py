@@ -0,0 +1,132 @@
+"""In-game profiler: rolling per-phase timings, an overlay and cProfile capture.
+
+The phases come from a timing.PhaseTimer shared by the main loop, the Game
+and the Renderer, or, when the game runs on a sim_thread.SimulationThread,
+from the thread's own timer by way of its snapshots. While the overlay is
+hidden they hold timing.null_timer instead, so profiling costs nothing unless
+it is switched on.
+"""
+import cProfile
+import pstats
+from collections import deque
+
+import pygame
+
+
+class FrameStats:
+    """Rolling window of frame times and per-phase timings"""
+
+    def __init__(self, window=120):
+        self.window = window
+        self.frame_times = deque(maxlen=window)  # ms between displayed frames
+        self.phases = {}  # name -> deque of ms, aligned with frame_times
+
+    def add(self, phases, frame_ms):
+        """Record one frame's {phase: ms} and its total duration"""
+        self.frame_times.append(frame_ms)
+        for name in phases.keys() - self.phases.keys():
+            self.phases[name] = deque([0.0] * (len(self.frame_times) - 1), maxlen=self.window)
+        for name, samples in self.phases.items():
+            samples.append(phases.get(name, 0.0))
+
+    def averages(self):
+        """Return {phase: mean ms} over the window"""
+        return {name: sum(samples) / len(samples) for name, samples in self.phases.items() if samples}
+
+    def clear(self):
+        """Forget all samples"""
+        self.frame_times.clear()
+        self.phases.clear()
+
+
+class ProfilerOverlay:
+    """Panel with per-phase milliseconds, entity counts and a frame time graph.
+
+    The panel is re-rendered every refresh_ms and blitted as-is in between.
+    """
+
+    def __init__(self, font, width=250, graph_height=60, refresh_ms=250, budget_ms=1000 / 60):
+        self.font = font
+        self.width = width
+        self.graph_height = graph_height
+        self.refresh_ms = refresh_ms
+        self.budget_ms = budget_ms
+        self.line_height = font.get_linesize()
+        self.surface = None
+        self.last_refresh = None
+
+    def draw(self, surface, stats, counts, now):
+        """Blit the overlay to the right edge of a surface, below the mini-map"""
+        if self.last_refresh is None or now - self.last_refresh >= self.refresh_ms:
+            self.last_refresh = now
+            self.surface = self.render(stats, counts)
+        surface.blit(self.surface, (surface.get_width() - self.width - 10, 170))
+
+    def render(self, stats, counts):
+        """Draw the overlay panel from the current stats"""
+        frame_times = stats.frame_times
+        averages = stats.averages()
+        mean_frame = sum(frame_times) / len(frame_times) if frame_times else 0.0
+        fps = 1000 / mean_frame if mean_frame else 0.0
+
+        # (label, value, color) rows; values are right-aligned
+        lines = [("frame", f"{mean_frame:.2f}ms ({fps:.0f} fps)", (255, 255, 255))]
+        for name, ms in sorted(averages.items(), key=lambda item: -item[1]):
+            lines.append((name, f"{ms:.3f}ms", (200, 200, 200)))
+        if counts:
+            lines.append(("  ".join(f"{name} {count}" for name, count in counts.items()), "", (150, 200, 255)))
+
+        height = 10 + len(lines) * self.line_height + self.graph_height + 10
+        panel = pygame.Surface((self.width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        y = 5
+        for label, value, color in lines:
+            panel.blit(self.font.render(label, True, color), (5, y))
+            if value:
+                value_surface = self.font.render(value, True, color)
+                panel.blit(value_surface, (self.width - 5 - value_surface.get_width(), y))
+            y += self.line_height
+
+        # Frame time graph, scaled so two frame budgets fill its height
+        graph = pygame.Rect(5, y + 5, self.width - 10, self.graph_height)
+        pygame.draw.rect(panel, (60, 60, 60), graph, 1)
+        scale = graph.height / (self.budget_ms * 2)
+        budget_y = graph.bottom - self.budget_ms * scale
+        pygame.draw.line(panel, (0, 120, 0), (graph.left, budget_y), (graph.right - 1, budget_y))
+        if len(frame_times) > 1:
+            step = graph.width / (stats.window - 1)
+            points = [(graph.left + i * step, graph.bottom - 1 - min(ms * scale, graph.height - 1))
+                      for i, ms in enumerate(frame_times)]
+            pygame.draw.lines(panel, (255, 200, 0), False, points)
+        return panel
+
+
+class ProfileWindow:
+    """Runs cProfile over a window of frames and dumps the stats when it ends"""
+
+    def __init__(self, first, last, path="profile.prof"):
+        self.first = first
+        self.last = last
+        self.path = path
+        self.profile = None
+        self.done = False
+
+    def frame(self, number):
+        """Call at the start of every frame with its number"""
+        if self.done:
+            return
+        if self.profile is None and number >= self.first:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif self.profile is not None and number > self.last:
+            self.finish()
+
+    def finish(self):
+        """Stop profiling (if it started) and write the stats"""
+        if self.done or self.profile is None:
+            return
+        self.profile.disable()
+        self.done = True
+        self.profile.dump_stats(self.path)
+        print(f"Profiled frames {self.first}-{self.last}, stats written to {self.path}")
+        pstats.Stats(self.profile).sort_stats("cumulative").print_stats(20)
@@ -0,0 +1,65 @@
+"""Adaptive drawing quality, driven by a frame-time budget.
+
+QualityGovernor watches a rolling average of how long frames take to
+produce. Over budget, it steps down one tier of quality_tiers, each of which
+keeps the cuts of the tiers before it; with enough headroom it steps back
+up. After every change it waits for a full window of new frames before
+deciding again, and the budget and headroom thresholds are far enough apart
+that a tier which only just fits is kept. A tier that is stepped back down
+from soon after being stepped up to waits twice as long for its next try.
+"""
+from collections import deque
+
+# Tier names, from full quality down; render.Renderer.set_quality() applies them
+quality_tiers = ["full", "less blood", "no health bars", "slower animation", "fewer sprite angles",
+                 "slower mini-map"]
+
+
+class QualityGovernor:
+    """Picks a quality tier from recent frame times"""
+
+    def __init__(self, budget_ms=1000 / 60, window=60, headroom=0.6, tier=0, fixed=False, max_backoff=8):
+        self.budget_ms = budget_ms
+        self.window = window
+        self.headroom = headroom  # step up once frames average under this share of the budget
+        self.tier = tier
+        self.fixed = fixed  # never change the tier
+        self.max_backoff = max_backoff
+        self.samples = deque(maxlen=window)
+        self.backoff = 1  # multiple of the window to wait before stepping up
+        self.frames_since_change = 0
+        self.stepped_up = False  # whether the last change was a step up
+
+    def add(self, frame_ms):
+        """Record how long a frame took to produce; returns True if the tier changed"""
+        self.samples.append(frame_ms)
+        self.frames_since_change += 1
+        if self.fixed or len(self.samples) < self.window:
+            return False
+
+        mean = sum(self.samples) / len(self.samples)
+        if mean > self.budget_ms and self.tier < len(quality_tiers) - 1:
+            # Stepping straight back down from a step up means that tier does not fit yet
+            if self.stepped_up and self.frames_since_change < self.window * 2:
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+            self._change(1)
+            self.stepped_up = False
+            return True
+        if (mean < self.budget_ms * self.headroom and self.tier > 0
+                and self.frames_since_change >= self.window * self.backoff):
+            self._change(-1)
+            self.stepped_up = True
+            return True
+        return False
+
+    def _change(self, step):
+        self.tier += step
+        self.samples.clear()
+        self.frames_since_change = 0
+
+    def reset(self):
+        """Forget recent frames, keeping the current tier"""
+        self.samples.clear()
+        self.frames_since_change = 0
+        self.backoff = 1
+        self.stepped_up = False
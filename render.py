@@ -0,0 +1,376 @@
+"""Draws a game.Game onto a pygame surface.
+
+The Renderer owns everything that only exists for display: fonts, sprites,
+the sprite, terrain, decal and HUD caches, the camera and the zombie
+animation clock. Moving things are drawn between their positions at the last
+two ticks, so motion stays smooth when the display and tick rates differ.
+"""
+import math
+
+import pygame
+
+import assets
+from decals import BloodDecals
+from game import (blood_duration, player_size, powerup_types, tick_ms, tile_size, wave_break_duration, weapons_list,
+                  zombie_types)
+from hud import Hud, TextCache
+from render_queue import RenderQueue, Stamps
+from sprite_cache import SpriteCache
+from terrain import TerrainChunks
+from timing import null_timer
+
+
+def load_zombie_frames():
+    """Load the skeleton animation frames from their atlas"""
+    return assets.load_animation("sprites/skeleton-move_*.png", "skeleton-move")
+
+
+def make_player_surface():
+    """Draw the player triangle, pointing right"""
+    player_surface = pygame.Surface((player_size, player_size), pygame.SRCALPHA)
+    pygame.draw.polygon(
+        player_surface,
+        (0, 200, 0),
+        [(player_size, player_size // 2), (0, 0), (0, player_size)]
+    )
+    return player_surface
+
+
+class Renderer:
+    """Draws the menu, game and game over screens"""
+
+    def __init__(self, screen, world, sprite_angles=64, sprite_cache_mb=32, chunk_size=400):
+        self.screen = screen
+        self.width, self.height = screen.get_size()
+        self.font = assets.font(24)
+        self.small_font = assets.font(18)
+
+        self.zombie_frames = load_zombie_frames()
+        self.player_surface = make_player_surface()
+
+        # Scaled and rotated copies of the zombie frames and the player triangle
+        self.sprite_angles = sprite_angles
+        self.sprite_cache = SpriteCache(sprite_angles, sprite_cache_mb * 1024 * 1024)
+
+        # Entities are drawn in batches, one layer at a time, from pre-rendered stamps
+        self.stamps = Stamps()
+        self.entity_queue = RenderQueue(["bullets", "player", "zombies", "powerups"])
+        self.mini_map_queue = RenderQueue(["zombies", "powerups"])
+        self.cull_margin = 50  # px beyond the screen edge that a sprite or health bar can reach
+
+        # Terrain never changes after generation, so it is drawn from baked chunks
+        self.terrain_chunks = TerrainChunks(world.tile, tile_size, chunk_size)
+        self.blood_decals = BloodDecals(blood_duration, chunk_size)
+
+        # Camera offset
+        self.camera_x = 0
+        self.camera_y = 0
+
+        self.zombie_animation_speed = 100  # ms per frame
+        self.zombie_last_frame_time = 0
+        self.zombie_current_frame = 0
+
+        # Quality settings, changed by set_quality()
+        self.quality = 0
+        self.health_bars = True
+        self.mini_map_interval = 0  # ms of game time between mini-map redraws
+        self.mini_map_surface = None
+        self.mini_map_time = -math.inf
+
+        self.timer = null_timer  # a timing.PhaseTimer to time the phases of draw_game()
+
+        self.build_huds()
+
+    def build_huds(self):
+        """Create the HUD widgets, re-rendered only when the values bound to them change"""
+        width, height = self.width, self.height
+        font, small_font = self.font, self.small_font
+        self.text_cache = TextCache()
+
+        self.menu_hud = Hud(self.text_cache)
+        self.menu_hud.text("title", font, "ZOMBIE SURVIVAL ROGUELIKE", (width // 2, height // 2 - 50), (255, 0, 0),
+                           "midtop").update()
+        self.menu_hud.text("instructions", font, "Press SPACE to start", (width // 2, height // 2 + 50),
+                           anchor="midtop").update()
+        self.menu_hud.text("controls", small_font, "WASD: Move | Mouse: Aim | Click: Shoot | 1-4: Change Weapon",
+                           (width // 2, height // 2 + 100), (200, 200, 200), "midtop").update()
+
+        self.game_over_hud = Hud(self.text_cache)
+        self.game_over_hud.text("title", font, "GAME OVER", (width // 2, height // 2 - 50), (255, 0, 0),
+                                "midtop").update()
+        self.game_over_hud.text("score", font, "Score: {}", (width // 2, height // 2), anchor="midtop")
+        self.game_over_hud.text("wave", font, "Survived to Wave: {}", (width // 2, height // 2 + 30), anchor="midtop")
+        self.game_over_hud.text("restart", font, "Press SPACE to return to menu", (width // 2, height // 2 + 80),
+                                anchor="midtop").update()
+
+        game_hud = self.game_hud = Hud(self.text_cache)
+        game_hud.panel("info_panel", (200, 95), (10, 10))
+        game_hud.text("health", font, "Health: {}/{}", (20, 15))
+        game_hud.text("wave", font, "Wave: {}", (20, 40))
+        game_hud.text("score", font, "Score: {}", (20, 65))
+        game_hud.text("weapon", small_font, "{}: {}", (width - 150, height - 30))
+        game_hud.text("wave_cleared", font, "Wave {} cleared! Next wave in {:.1f}s", (width // 2, 50),
+                      anchor="midtop")
+        game_hud.text("wave_progress", font, "Wave {}: {:.1f}% ({}/{})", (width // 2, 50), anchor="midtop")
+        game_hud.bar("xp_bar", (200, 10), (10, height - 20), (50, 50, 100), (100, 100, 255))
+        game_hud.text("xp", small_font, "Level {} - XP: {}/{}", (220, height - 20))
+        game_hud.bar("wave_bar", (200, 5), (width // 2 - 100, 30), (100, 50, 50), (200, 100, 100))
+        game_hud.panel("weapon_panel", (400, 30), (width // 2 - 200, height - 40))
+        for i, weapon_name in enumerate(weapons_list):
+            game_hud.panel(f"weapon_bg_{i}", (95, 25), (width // 2 - 190 + i * 100, height - 37))
+            game_hud.text(f"weapon_{i}", small_font, "{}: {}", (width // 2 - 180 + i * 100, height - 35))
+            game_hud.text(f"weapon_key_{i}", small_font, f"[{i + 1}]", (width // 2 - 190 + i * 100, height - 35),
+                          (200, 200, 200)).update()
+
+    def reset(self):
+        """Forget per-game display state when a new game starts"""
+        self.camera_x = 0
+        self.camera_y = 0
+        self.blood_decals.clear()
+        self.zombie_last_frame_time = 0
+        self.zombie_current_frame = 0
+        self.mini_map_time = -math.inf
+
+    def set_quality(self, tier):
+        """Apply a tier of quality.quality_tiers; each tier keeps the cuts of the ones before it"""
+        self.quality = tier
+        self.blood_decals.duration = blood_duration / 2 if tier >= 1 else blood_duration
+        self.blood_decals.max_stamps = 8 if tier >= 1 else None
+        self.health_bars = tier < 2
+        self.zombie_animation_speed = 200 if tier >= 3 else 100
+        self.sprite_cache.set_angle_steps(max(self.sprite_angles // 4, 8) if tier >= 4 else self.sprite_angles)
+        self.mini_map_interval = 250 if tier >= 5 else 0
+
+    def world_to_screen(self, wx, wy):
+        """Convert world coordinates to screen coordinates"""
+        return wx - self.camera_x, wy - self.camera_y
+
+    def screen_to_world(self, sx, sy):
+        """Convert screen coordinates to world coordinates"""
+        return sx + self.camera_x, sy + self.camera_y
+
+    def get_zombie_frame_index(self, now):
+        """Advance the zombie animation and return the current frame index"""
+        if now - self.zombie_last_frame_time > self.zombie_animation_speed:
+            self.zombie_last_frame_time = now
+            self.zombie_current_frame = (self.zombie_current_frame + 1) % len(self.zombie_frames)
+
+        return self.zombie_current_frame
+
+    def queue_health_bar(self, blits, x, y, health, max_health, width=40, height=5):
+        """Queue a health bar centered above a position"""
+        position = (int(x) - width // 2, int(y) - 20)
+        blits.append((self.stamps.rect((200, 0, 0), width, height), position))
+        filled = int(width * health / max_health)
+        if filled > 0:
+            blits.append((self.stamps.rect((0, 200, 0), filled, height), position))
+
+    def draw_menu(self):
+        """Draw the title screen"""
+        self.screen.fill((30, 30, 30))
+        self.menu_hud.draw(self.screen)
+
+    def draw_game_over(self, game):
+        """Draw the final score screen"""
+        self.screen.fill((30, 0, 0))
+        self.game_over_hud["score"].update(game.player_score)
+        self.game_over_hud["wave"].update(game.wave)
+        self.game_over_hud.draw(self.screen)
+
+    def draw_game(self, game, alpha=1.0):
+        """Draw the world, entities and HUD for the current game state.
+
+        alpha is how far the display is between the previous tick (0) and the
+        latest one (1); positions are interpolated by it.
+        """
+        screen = self.screen
+        now = game.time - (1 - alpha) * tick_ms
+
+        # Calculate camera position (center on player)
+        player_x = game.prev_player_x + (game.player_x - game.prev_player_x) * alpha
+        player_y = game.prev_player_y + (game.player_y - game.prev_player_y) * alpha
+        self.camera_x = player_x - self.width // 2
+        self.camera_y = player_y - self.height // 2
+
+        # Draw everything
+        screen.fill((30, 30, 30))
+
+        # Draw world tiles visible on screen
+        self.terrain_chunks.draw(screen, self.camera_x, self.camera_y)
+
+        # Draw blood splatters (new ones are stamped into the decal layers once)
+        self.blood_decals.sync(game.blood_splatters, game.time)
+        self.blood_decals.fade(game.time)
+        self.blood_decals.draw(screen, self.camera_x, self.camera_y)
+        self.timer.lap("terrain")
+
+        queue = self.entity_queue
+        stamps = self.stamps
+
+        # Only entities within margin pixels of the screen are drawn
+        margin = self.cull_margin
+        right = self.width + margin
+        bottom = self.height + margin
+
+        # Draw bullets
+        back = 1 - alpha
+        blits = queue["bullets"]
+        for x, y, dx, dy, _, radius, color, _, _ in game.bullets:
+            screen_x, screen_y = self.world_to_screen(x - dx * back, y - dy * back)
+            if not (-margin < screen_x < right and -margin < screen_y < bottom):
+                continue
+            blits.append((stamps.circle(color, radius), (int(screen_x) - radius, int(screen_y) - radius)))
+
+        # Draw player
+        angle_deg = -math.degrees(game.aim_angle)
+        rotated_surface = self.sprite_cache.get("player", self.player_surface, player_size, angle_deg)
+        player_screen_x, player_screen_y = self.world_to_screen(player_x, player_y)
+        rotated_rect = rotated_surface.get_rect(center=(player_screen_x, player_screen_y))
+        queue["player"].append((rotated_surface, rotated_rect.topleft))
+
+        # Get current animation frame
+        frame_index = self.get_zombie_frame_index(now)
+        frame = self.zombie_frames[frame_index]
+
+        blits = queue["zombies"]
+        for x, y, _, health, ztype, prev_x, prev_y in game.zombies:
+            x = prev_x + (x - prev_x) * alpha
+            y = prev_y + (y - prev_y) * alpha
+            screen_x, screen_y = self.world_to_screen(x, y)
+            if not (-margin < screen_x < right and -margin < screen_y < bottom):
+                continue
+            z_size = zombie_types[ztype]["size"]
+
+            # Get direction to player for sprite facing
+            dx = player_x - x
+            dy = player_y - y
+            angle_rad = math.atan2(dy, dx)
+            angle_deg = -math.degrees(angle_rad)
+
+            # Scale sprite to match zombie size and rotate it to face player
+            rotated_frame = self.sprite_cache.get(frame_index, frame, z_size, angle_deg)
+
+            # Draw zombie sprite, centered
+            blits.append((rotated_frame, (screen_x - rotated_frame.get_width() // 2,
+                                          screen_y - rotated_frame.get_height() // 2)))
+
+            # Draw health bar above zombie
+            if self.health_bars:
+                self.queue_health_bar(blits, screen_x, screen_y, health, zombie_types[ztype]["health"],
+                                      width=z_size)
+
+        # Draw powerups
+        blits = queue["powerups"]
+        for x, y, ptype, _ in game.powerups:
+            screen_x, screen_y = self.world_to_screen(x, y)
+            if not (-margin < screen_x < right and -margin < screen_y < bottom):
+                continue
+            info = powerup_types[ptype]
+
+            # Make powerups pulse to draw attention
+            size_mod = math.sin(now / 200) * 2
+            size = int(info["size"] + size_mod)
+
+            # Draw powerup with an inner highlight
+            blits.append((stamps.circle(info["color"], size, (255, 255, 255)),
+                          (int(screen_x) - size, int(screen_y) - size)))
+
+        queue.flush(screen)
+        self.timer.lap("entities")
+
+        # Draw UI elements
+        self.draw_mini_map(game)
+        self.update_game_hud(game, game.time)
+        self.game_hud.draw(screen)
+        self.timer.lap("hud")
+
+    def draw_mini_map(self, game, size=150):
+        """Draw a mini-map in the corner, redrawn at most every mini_map_interval ms"""
+        if game.time - self.mini_map_time < self.mini_map_interval and self.mini_map_surface is not None:
+            self.blit_mini_map(self.mini_map_surface, size)
+            return
+        self.mini_map_time = game.time
+        map_surface = self.mini_map_surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        map_surface.fill((0, 0, 0, 150))
+
+        # Draw player
+        pygame.draw.circle(map_surface, (0, 255, 0), (size // 2, size // 2), 4)
+
+        # Draw zombies
+        map_scale = size / 1200  # Show 1200x1200 area on minimap
+        queue = self.mini_map_queue
+        stamps = self.stamps
+
+        blits = queue["zombies"]
+        for zx, zy, _, _, ztype, _, _ in game.zombies:
+            relative_x = (zx - game.player_x) * map_scale + size // 2
+            relative_y = (zy - game.player_y) * map_scale + size // 2
+
+            if 0 < relative_x < size and 0 < relative_y < size:
+                blits.append((stamps.circle(zombie_types[ztype]["color"], 2),
+                              (int(relative_x) - 2, int(relative_y) - 2)))
+
+        # Draw powerups
+        blits = queue["powerups"]
+        for px, py, ptype, _ in game.powerups:
+            relative_x = (px - game.player_x) * map_scale + size // 2
+            relative_y = (py - game.player_y) * map_scale + size // 2
+
+            if 0 < relative_x < size and 0 < relative_y < size:
+                blits.append((stamps.circle(powerup_types[ptype]["color"], 2),
+                              (int(relative_x) - 2, int(relative_y) - 2)))
+        queue.flush(map_surface)
+        self.blit_mini_map(map_surface, size)
+
+    def blit_mini_map(self, map_surface, size):
+        """Draw the mini-map and its border onto the screen"""
+        self.screen.blit(map_surface, (self.width - size - 10, 10))
+        pygame.draw.rect(self.screen, (200, 200, 200), (self.width - size - 10, 10, size, size), 1)
+
+    def update_game_hud(self, game, now):
+        """Bind the current player stats and game info to the HUD widgets"""
+        game_hud = self.game_hud
+        game_hud["health"].update(int(game.player_health), game.player_max_health)
+        game_hud["wave"].update(game.wave)
+        game_hud["score"].update(game.player_score)
+
+        # Weapon and ammo
+        game_hud["weapon"].update(game.current_weapon.capitalize(), game.ammo[game.current_weapon])
+
+        # Active powerups
+        y_offset = 110
+        shown = 0
+        for i, (ptype, end_time, _) in enumerate(game.active_powerups):
+            name = f"powerup_{i}"
+            if name not in game_hud.widgets:
+                game_hud.text(name, self.small_font, "{}: {:.1f}s", (20, y_offset + i * 20))
+            time_left = max(0, (end_time - now) / 1000)
+            game_hud[name].update(ptype.capitalize(), time_left, color=powerup_types[ptype]["color"])
+            game_hud.show(name, time_left > 0)
+            shown += 1
+        while f"powerup_{shown}" in game_hud.widgets:
+            game_hud.show(f"powerup_{shown}", False)
+            shown += 1
+
+        # Wave information
+        game_hud.show("wave_cleared", game.wave_cleared)
+        game_hud.show("wave_progress", not game.wave_cleared)
+        game_hud.show("wave_bar", not game.wave_cleared)
+        if game.wave_cleared:
+            time_to_next = max(0, (wave_break_duration - (now - game.wave_start_time)) / 1000)
+            game_hud["wave_cleared"].update(game.wave, time_to_next)
+        else:
+            progress = game.zombies_killed_in_wave / game.zombies_per_wave * 100
+            game_hud["wave_progress"].update(game.wave, progress, game.zombies_killed_in_wave, game.zombies_per_wave)
+            game_hud["wave_bar"].update(game.zombies_killed_in_wave / game.zombies_per_wave)
+
+        # XP bar
+        game_hud["xp_bar"].update(game.player_xp / game.player_xp_to_level)
+        game_hud["xp"].update(game.player_level, game.player_xp, game.player_xp_to_level)
+
+        # Weapon selector, highlighting the current weapon
+        for i, weapon in enumerate(weapons_list):
+            game_hud[f"weapon_bg_{i}"].update((100, 100, 100, 150) if weapon == game.current_weapon
+                                              else (50, 50, 50, 150))
+            weapon_color = (255, 255, 255) if game.ammo[weapon] > 0 else (255, 100, 100)
+            game_hud[f"weapon_{i}"].update(weapon.capitalize(), game.ammo[weapon], color=weapon_color)
@@ -0,0 +1,69 @@
+"""Batched drawing: blits are collected per layer and submitted together.
+
+Drawing thousands of circles and rects one pygame call at a time costs a
+round trip into C for each. Instead, shapes are pre-rendered once into
+stamps, and a frame's blits are queued per layer and drawn with a single
+Surface.fblits (pygame-ce) or Surface.blits call per layer, layers in the
+order they were declared.
+"""
+import pygame
+
+
+class RenderQueue:
+    """Per-layer lists of (surface, position) blits"""
+
+    def __init__(self, layers):
+        self.layers = {name: [] for name in layers}
+
+    def __getitem__(self, name):
+        """Return a layer's blit list, to append (surface, position) pairs to"""
+        return self.layers[name]
+
+    def flush(self, target):
+        """Draw every layer onto target, in order, and empty the queue"""
+        fblits = getattr(target, "fblits", None)
+        for blits in self.layers.values():
+            if not blits:
+                continue
+            if fblits is not None:
+                fblits(blits)
+            else:
+                target.blits(blits, doreturn=False)
+            blits.clear()
+
+
+class Stamps:
+    """Pre-rendered filled circles and rects, keyed by color and size"""
+
+    def __init__(self):
+        self.surfaces = {}
+
+    def circle(self, color, radius, highlight=None):
+        """Return a circle as drawn by pygame.draw.circle at (radius, radius).
+
+        A highlight color adds an inner circle of half the radius.
+        """
+        key = ("circle", color, radius, highlight)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            size = max(radius * 2, 1)
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (radius, radius), radius)
+            if highlight is not None:
+                pygame.draw.circle(surface, highlight, (radius, radius), radius // 2)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            self.surfaces[key] = surface
+        return surface
+
+    def rect(self, color, width, height):
+        """Return a solid rect"""
+        key = ("rect", color, width, height)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((width, height))
+            surface.fill(color)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            self.surfaces[key] = surface
+        return surface
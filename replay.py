@@ -0,0 +1,130 @@
+"""Record the inputs of a game to disk and play them back.
+
+A game is fully determined by its map seed, its game seed, its entity
+backend and the Inputs of every tick, so that is all a replay stores. The
+file is a short header followed by one fixed-size record per tick:
+
+    header: b"ZREP", version (u16), map seed (u64), game seed (u64), backend (u8)
+    tick:   move_x (i8), move_y (i8), aim_angle (f64), flags (u8)
+
+backend is 1 for the NumPy backend and 0 for plain lists. In a tick, the low
+bit of flags is fire; the rest is 1 + the index of the weapon switched to in
+weapons_list, or 0 for no switch.
+"""
+import struct
+
+import entity_arrays
+from game import Inputs, weapons_list
+
+magic = b"ZREP"
+version = 3
+header_format = struct.Struct("<4sHQQB")
+tick_format = struct.Struct("<bbdB")
+
+
+def pack_inputs(inputs):
+    """Encode one tick of Inputs as a record"""
+    weapon = 0 if inputs.weapon is None else weapons_list.index(inputs.weapon) + 1
+    return tick_format.pack(inputs.move_x, inputs.move_y, inputs.aim_angle, bool(inputs.fire) | weapon << 1)
+
+
+def unpack_inputs(move_x, move_y, aim_angle, flags):
+    """Decode the fields of one record back into Inputs"""
+    weapon = flags >> 1
+    return Inputs(move_x, move_y, aim_angle, bool(flags & 1), weapons_list[weapon - 1] if weapon else None)
+
+
+class ReplayWriter:
+    """Streams the inputs of one game to a file, flushing in large blocks"""
+
+    def __init__(self, path, map_seed, game_seed, use_numpy=False, buffer_size=64 * 1024):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.ticks = 0
+        self.file = open(path, "wb")
+        self.file.write(header_format.pack(magic, version, map_seed, game_seed, bool(use_numpy)))
+
+    def record(self, inputs):
+        """Append the inputs for the next tick"""
+        self.buffer += pack_inputs(inputs)
+        self.ticks += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write out the buffered ticks"""
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        """Flush and close the file"""
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Replay:
+    """The seeds, backend and per-tick inputs of a recorded game"""
+
+    def __init__(self, map_seed, game_seed, use_numpy, inputs):
+        self.map_seed = map_seed
+        self.game_seed = game_seed
+        self.use_numpy = use_numpy  # whether the game kept its entities in NumPy arrays
+        self.inputs = inputs
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def policy(self):
+        """Return a policy that feeds the recorded inputs back in, one per tick.
+
+        After the last recorded tick it returns None.
+        """
+        inputs = iter(self.inputs)
+        return lambda game: next(inputs, None)
+
+    def backend(self, requested_numpy):
+        """Return use_numpy for playing the replay back, which is always the backend it was recorded with.
+
+        The backends play differently, so a replay cannot be played on the
+        other one: a request for it only prints a note. Raises ValueError if
+        the replay needs NumPy and it is not installed.
+        """
+        if self.use_numpy and not entity_arrays.available():
+            raise ValueError("the replay was recorded with the NumPy backend, and NumPy is not installed")
+        if requested_numpy != self.use_numpy:
+            print(f"Playing the replay on the {backend_name(self.use_numpy)} backend it was recorded with")
+        return self.use_numpy
+
+
+def backend_name(use_numpy):
+    return "NumPy" if use_numpy else "list"
+
+
+def load(path):
+    """Read a replay file"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if len(data) < header_format.size:
+        raise ValueError(f"{path} is too short to be a replay")
+    file_magic, file_version = struct.unpack_from("<4sH", data)
+    if file_magic != magic:
+        raise ValueError(f"{path} is not a replay")
+    if file_version != version:
+        raise ValueError(f"{path} is replay version {file_version}, expected {version}")
+    _, _, map_seed, game_seed, backend = header_format.unpack_from(data)
+
+    # A truncated last record (from a crash mid-write) is ignored
+    body = memoryview(data)[header_format.size:]
+    body = body[:len(body) - len(body) % tick_format.size]
+    inputs = [unpack_inputs(*fields) for fields in tick_format.iter_unpack(body)]
+    return Replay(map_seed, game_seed, bool(backend), inputs)
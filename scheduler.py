@@ -0,0 +1,27 @@
+import heapq
+import itertools
+
+
+class Scheduler:
+    """Runs callbacks once the game clock reaches their time, earliest first.
+
+    Events due at the same time run in the order they were scheduled.
+    """
+
+    def __init__(self):
+        self.queue = []  # heap of (time, sequence number, callback, args)
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.queue)
+
+    def schedule(self, time, callback, *args):
+        """Call callback(*args) at a game time"""
+        heapq.heappush(self.queue, (time, next(self.counter), callback, args))
+
+    def run_due(self, now):
+        """Run every event due at or before now"""
+        queue = self.queue
+        while queue and queue[0][0] <= now:
+            _, _, callback, args = heapq.heappop(queue)
+            callback(*args)
@@ -0,0 +1,119 @@
+"""Runs a game.Game at its fixed tick rate on a thread of its own.
+
+The display loop hands inputs in with set_inputs() and choose_weapon() and
+draws the snapshot.Snapshot published after every tick, so a slow frame
+delays neither ticks nor the reading of the inputs that drive them. The
+game object itself belongs to the thread until it is stopped. While
+profiling is on, the thread times each tick's phases with a PhaseTimer of
+its own and publishes them with the snapshot.
+"""
+import threading
+import time
+
+from game import Inputs, no_input, tick_ms
+from snapshot import Snapshot, SnapshotBuffer
+from timing import PhaseTimer, null_timer
+
+
+class SimulationThread:
+    """Steps a game every tick_ms, from the latest inputs or from a policy"""
+
+    def __init__(self, game, policy=None, recorder=None, max_ticks_behind=5):
+        self.game = game
+        self.policy = policy  # called with the game for each tick's inputs, like a replay's
+        self.recorder = recorder
+        self.max_ticks_behind = max_ticks_behind
+        self.snapshots = SnapshotBuffer()
+        self.inputs = no_input
+        self.weapon_choice = None
+        self.input_lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.tick_times = []  # perf_counter() of recent ticks, for tick_rate()
+        self.timer = null_timer
+        self.snapshots.publish(self.snapshot([], {}))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop ticking and wait for the thread to finish"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def set_inputs(self, move_x, move_y, aim_angle, fire):
+        """Set the movement, aim and trigger used from the next tick on"""
+        with self.input_lock:
+            self.inputs = Inputs(move_x, move_y, aim_angle, fire, None)
+
+    def choose_weapon(self, weapon):
+        """Switch weapons on the next tick"""
+        with self.input_lock:
+            self.weapon_choice = weapon
+
+    def set_profiling(self, enabled):
+        """Time the phases of each tick from the next tick on, or stop timing them"""
+        self.timer = PhaseTimer() if enabled else null_timer
+
+    def next_inputs(self):
+        """Return the inputs for the next tick, using up any weapon choice"""
+        if self.policy is not None:
+            return self.policy(self.game)
+        with self.input_lock:
+            inputs = self.inputs
+            if self.weapon_choice is not None:
+                inputs = inputs._replace(weapon=self.weapon_choice)
+                self.weapon_choice = None
+        if self.recorder is not None:
+            self.recorder.record(inputs)
+        return inputs
+
+    def snapshot(self, events, phases):
+        """Capture the game after a tick, with the blood added and the {phase: ms} spent by that tick"""
+        game = self.game
+        blood = []
+        for splatter in reversed(game.blood_splatters):
+            if splatter[3] < game.time:
+                break
+            blood.append(tuple(splatter))
+        blood.reverse()
+        return Snapshot(game, blood, events, phases)
+
+    def run(self):
+        game = self.game
+        tick_seconds = tick_ms / 1000
+        next_tick = time.perf_counter()
+        while not self.stopping.is_set() and not game.over:
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                continue
+            if now - next_tick > tick_seconds * self.max_ticks_behind:
+                # Too far behind to catch up: drop the lost time instead
+                next_tick = now
+
+            timer = self.timer
+            game.timer = timer
+            timer.start()
+            inputs = self.next_inputs()
+            if inputs is None:
+                # The replay has run out
+                game.over = True
+            else:
+                game.step(inputs)
+            self.snapshots.publish(self.snapshot(list(game.events), timer.finish()))
+            next_tick += tick_seconds
+
+            self.tick_times.append(now)
+            if len(self.tick_times) > 120:
+                del self.tick_times[:60]
+
+    def tick_rate(self):
+        """Return ticks per second over the last second or so"""
+        times = self.tick_times[-61:]
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
@@ -0,0 +1,160 @@
+"""Immutable copies of the drawable game state, for drawing on another thread.
+
+A Snapshot has the attributes of game.Game that render.Renderer reads, so the
+renderer can draw either. Zombies and bullets are copied into typed arrays
+(array.array, or NumPy arrays for the NumPy backend) rather than as one
+Python list per entity, and are read back through views that yield the same
+tuples as the game's own lists. Blood splatters, sound events and tick phase
+timings hold only what is new since the snapshot before, which SnapshotBuffer
+merges forward when a snapshot is never taken.
+"""
+import threading
+import time
+from array import array
+
+from game import zombie_types
+
+zombie_type_names = list(zombie_types)
+zombie_type_ids = {name: i for i, name in enumerate(zombie_type_names)}
+
+
+class ZombieView:
+    """Zombie arrays that iterate as (x, y, speed, health, type, prev_x, prev_y); speed is always 0"""
+
+    __slots__ = ("x", "y", "health", "type_id", "prev_x", "prev_y")
+
+    def __init__(self, x, y, health, type_id, prev_x, prev_y):
+        self.x, self.y, self.health, self.type_id, self.prev_x, self.prev_y = x, y, health, type_id, prev_x, prev_y
+
+    @classmethod
+    def copy(cls, zombies):
+        """Copy a game's zombies, from either backend"""
+        if not isinstance(zombies, list):
+            n = zombies.count
+            return cls(zombies.x[:n].copy(), zombies.y[:n].copy(), zombies.health[:n].copy(),
+                       zombies.type_id[:n].copy(), zombies.prev_x[:n].copy(), zombies.prev_y[:n].copy())
+        ids = zombie_type_ids
+        return cls(array("d", [z[0] for z in zombies]), array("d", [z[1] for z in zombies]),
+                   array("d", [z[3] for z in zombies]), array("b", [ids[z[4]] for z in zombies]),
+                   array("d", [z[5] for z in zombies]), array("d", [z[6] for z in zombies]))
+
+    def __len__(self):
+        return len(self.x)
+
+    def __iter__(self):
+        names = zombie_type_names
+        for x, y, health, type_id, prev_x, prev_y in zip(self.x.tolist(), self.y.tolist(), self.health.tolist(),
+                                                         self.type_id.tolist(), self.prev_x.tolist(),
+                                                         self.prev_y.tolist()):
+            yield x, y, 0, health, names[type_id], prev_x, prev_y
+
+
+class BulletView:
+    """Bullet arrays that iterate as the game's bullet entries, with damage, hits and frame fired left at 0"""
+
+    __slots__ = ("x", "y", "dx", "dy", "radius", "color_id", "colors")
+
+    # Bullet colors seen so far, shared by every snapshot
+    palette = []
+    palette_ids = {}
+
+    def __init__(self, x, y, dx, dy, radius, color_id, colors):
+        self.x, self.y, self.dx, self.dy, self.radius, self.color_id = x, y, dx, dy, radius, color_id
+        self.colors = colors
+
+    @classmethod
+    def copy(cls, bullets):
+        """Copy a game's bullets, from either backend"""
+        if not isinstance(bullets, list):
+            n = bullets.count
+            return cls(bullets.x[:n].copy(), bullets.y[:n].copy(), bullets.dx[:n].copy(), bullets.dy[:n].copy(),
+                       bullets.radius[:n].copy(), bullets.color_id[:n].copy(), list(bullets.colors))
+        ids = cls.palette_ids
+        for bullet in bullets:
+            if bullet[6] not in ids:
+                ids[bullet[6]] = len(cls.palette)
+                cls.palette.append(bullet[6])
+        return cls(array("d", [b[0] for b in bullets]), array("d", [b[1] for b in bullets]),
+                   array("d", [b[2] for b in bullets]), array("d", [b[3] for b in bullets]),
+                   array("h", [b[5] for b in bullets]), array("h", [ids[b[6]] for b in bullets]), cls.palette)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __iter__(self):
+        colors = self.colors
+        for x, y, dx, dy, radius, color_id in zip(self.x.tolist(), self.y.tolist(), self.dx.tolist(),
+                                                  self.dy.tolist(), self.radius.tolist(), self.color_id.tolist()):
+            yield x, y, dx, dy, 0, radius, colors[color_id], 0, 0
+
+
+class Snapshot:
+    """The state of a game after one tick, as far as drawing and the HUD need it"""
+
+    def __init__(self, game, blood_splatters, events, phases):
+        self.time = game.time
+        self.frame = game.frame
+        self.over = game.over
+        self.player_x = game.player_x
+        self.player_y = game.player_y
+        self.prev_player_x = game.prev_player_x
+        self.prev_player_y = game.prev_player_y
+        self.aim_angle = game.aim_angle
+        self.player_health = game.player_health
+        self.player_max_health = game.player_max_health
+        self.player_score = game.player_score
+        self.player_level = game.player_level
+        self.player_xp = game.player_xp
+        self.player_xp_to_level = game.player_xp_to_level
+        self.current_weapon = game.current_weapon
+        self.ammo = dict(game.ammo)
+        self.active_powerups = [tuple(powerup) for powerup in game.active_powerups]
+        self.wave = game.wave
+        self.wave_cleared = game.wave_cleared
+        self.wave_start_time = game.wave_start_time
+        self.zombies_killed_in_wave = game.zombies_killed_in_wave
+        self.zombies_per_wave = game.zombies_per_wave
+
+        self.zombies = ZombieView.copy(game.zombies)
+        self.bullets = BulletView.copy(game.bullets)
+        self.powerups = [tuple(powerup) for powerup in game.powerups]  # a few dozen at most
+        self.blood_splatters = blood_splatters  # [x, y, size, time] added since the previous snapshot
+        self.blood_count = len(game.blood_splatters)
+        self.events = events
+        self.phases = phases  # {phase: ms} of the tick, empty unless the simulation thread is profiling
+
+
+class SnapshotBuffer:
+    """The latest snapshot, handed from the simulation thread to the drawing thread.
+
+    publish() replaces the latest snapshot. If the one it replaces was never
+    taken, its new blood and events are carried into the new one, and its
+    phase timings added to the new one's, so none are lost when drawing falls
+    behind.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = None
+        self.published_at = 0.0
+        self.taken = True
+
+    def publish(self, snapshot):
+        with self.lock:
+            if not self.taken and self.latest is not None:
+                snapshot.blood_splatters = self.latest.blood_splatters + snapshot.blood_splatters
+                snapshot.events = self.latest.events + snapshot.events
+                phases = dict(self.latest.phases)
+                for name, ms in snapshot.phases.items():
+                    phases[name] = phases.get(name, 0.0) + ms
+                snapshot.phases = phases
+            self.latest = snapshot
+            self.published_at = time.perf_counter()
+            self.taken = False
+
+    def take(self):
+        """Return (latest snapshot, perf_counter() time it was published, whether it is new)"""
+        with self.lock:
+            fresh = not self.taken
+            self.taken = True
+            return self.latest, self.published_at, fresh
@@ -0,0 +1,66 @@
+import math
+
+
+class SpatialHash:
+    """Uniform grid that buckets items by position for neighbor queries"""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        """Empty every cell, keeping lists that were used last time for reuse"""
+        stale = [key for key, cell in self.cells.items() if not cell]
+        for key in stale:
+            del self.cells[key]
+        for cell in self.cells.values():
+            cell.clear()
+
+    def cell_of(self, x, y):
+        """Return the grid cell containing a world position"""
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def insert(self, item, x, y):
+        """Add an item at a world position"""
+        key = self.cell_of(x, y)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = []
+        cell.append(item)
+
+    def rebuild(self, positions):
+        """Clear the grid and insert the index of every (x, y, ...) entry"""
+        self.clear()
+        for i, entry in enumerate(positions):
+            self.insert(i, entry[0], entry[1])
+
+    def query(self, x, y):
+        """Return items in the cell containing (x, y) and its 8 neighbors.
+
+        Anything closer than one cell size to (x, y) is guaranteed to be
+        in the result.
+        """
+        cx, cy = self.cell_of(x, y)
+        found = []
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                cell = self.cells.get((gx, gy))
+                if cell:
+                    found.extend(cell)
+        return found
+
+    def query_segment(self, x0, y0, x1, y1):
+        """Return items in the cells around a line segment.
+
+        Like query(), anything closer than one cell size to any point of
+        the segment is guaranteed to be in the result.
+        """
+        first_x, first_y = self.cell_of(min(x0, x1), min(y0, y1))
+        last_x, last_y = self.cell_of(max(x0, x1), max(y0, y1))
+        found = []
+        for gx in range(first_x - 1, last_x + 2):
+            for gy in range(first_y - 1, last_y + 2):
+                cell = self.cells.get((gx, gy))
+                if cell:
+                    found.extend(cell)
+        return found
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class SpriteCache:
+    """LRU cache of scaled and rotated copies of sprite surfaces.
+
+    Angles are snapped to one of angle_steps directions, so each
+    (sprite, size, direction) combination is only resampled once. Least
+    recently used surfaces are dropped when the cache grows past max_bytes.
+    """
+
+    def __init__(self, angle_steps=64, max_bytes=32 * 1024 * 1024):
+        self.angle_steps = angle_steps
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def angle_bucket(self, angle_deg):
+        """Return the direction index closest to an angle in degrees"""
+        return round(angle_deg * self.angle_steps / 360) % self.angle_steps
+
+    def _store(self, key, surface):
+        """Add a surface and evict the oldest entries to stay under the cap"""
+        self.entries[key] = surface
+        self.bytes_used += surface.get_width() * surface.get_height() * surface.get_bytesize()
+        while self.bytes_used > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.bytes_used -= old.get_width() * old.get_height() * old.get_bytesize()
+
+    def _lookup(self, key):
+        """Return a cached surface and mark it as recently used"""
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+        return surface
+
+    def get(self, sprite_id, source, size, angle_deg):
+        """Return source scaled to size x size and rotated to face angle_deg.
+
+        sprite_id identifies source (e.g. an animation frame index) and is
+        used in the cache key.
+        """
+        bucket = self.angle_bucket(angle_deg)
+        key = (sprite_id, size, bucket)
+        rotated = self._lookup(key)
+        if rotated is not None:
+            self.hits += 1
+            return rotated
+        self.misses += 1
+
+        scaled_key = (sprite_id, size, None)
+        scaled = self._lookup(scaled_key)
+        if scaled is None:
+            if source.get_size() == (size, size):
+                scaled = source
+            else:
+                scaled = pygame.transform.scale(source, (size, size))
+                self._store(scaled_key, scaled)
+
+        rotated = pygame.transform.rotate(scaled, bucket * 360 / self.angle_steps)
+        self._store(key, rotated)
+        return rotated
+
+    def set_angle_steps(self, angle_steps):
+        """Change the number of directions, dropping the surfaces cached for the old ones"""
+        if angle_steps != self.angle_steps:
+            self.angle_steps = angle_steps
+            self.clear()
+
+    def clear(self):
+        """Drop every cached surface"""
+        self.entries.clear()
+        self.bytes_used = 0
@@ -0,0 +1,210 @@
+"""Play many headless games over a grid of balance settings, one worker process per core.
+
+Each --param names a setting in game.py by its dotted path, followed by the
+values to try. Every combination of values is played once for every seed in
+the range, and a CSV row per game is written as soon as the game ends, with
+a column per parameter followed by the results. Settings that others are
+computed from, such as player_size or a zombie's size, can be swept too: the
+computed ones are worked out again for every game.
+
+    python sweep.py --seeds 0:100 --param zombie_types.fast.speed=3,3.5,4 --out fast.csv
+    python sweep.py --seeds 0:50 --param wave_zombies_growth=2,3 --param weapons.pistol.damage=20,25,30
+    python sweep.py --seeds 0:50 --param weapons.sniper.pierce=1,2,3
+    python sweep.py --seeds 0:50 --param 'spawn_weights.6=[[0.6, 0.3, 0.1], [0.5, 0.3, 0.2]]'
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import entity_arrays
+import game as game_module
+import headless
+from game import generate_map
+
+# Settings that may be left out of their dict, and are added when swept
+optional_settings = {"pierce"}
+
+result_columns = ["seed", "wave", "waves_cleared", "kills", "score", "damage_taken", "died", "ticks", "game_seconds",
+                  "wave_seconds", "elapsed"]
+
+# Values replaced in this process, to be put back before the next game
+_originals = {}
+_missing = object()  # stands in for an optional setting that was not there
+
+
+# Settings
+
+def _parent(path):
+    """Return the container holding a setting and the key of the setting in it"""
+    parts = path.split(".")
+    target = game_module
+    for part in parts[:-1]:
+        target = _get(target, part)
+    return target, _key(target, parts[-1])
+
+
+def _key(target, key):
+    """Turn a path part into a list index or dict key, which may be a number"""
+    if isinstance(target, list):
+        return int(key)
+    if isinstance(target, dict) and key not in target and key.lstrip("-").isdigit():
+        return int(key)
+    return key
+
+
+def _get(target, key):
+    if target is game_module:
+        return getattr(target, key)
+    return target[_key(target, key)]
+
+
+def get_setting(path):
+    """Return the current value of a setting, raising LookupError or AttributeError if there is none.
+
+    An optional setting left out of its dict has the value None.
+    """
+    target, key = _parent(path)
+    if key in optional_settings and isinstance(target, dict):
+        return target.get(key)
+    return _get(target, key)
+
+
+def set_setting(path, value):
+    """Change a setting in place, so every module that imported it sees the change"""
+    target, key = _parent(path)
+    if path not in _originals:
+        _originals[path] = target.get(key, _missing) if isinstance(target, dict) else _get(target, key)
+    if target is game_module:
+        setattr(target, key, value)
+    else:
+        target[key] = value
+
+
+def restore_settings():
+    """Put back every setting changed by set_setting()"""
+    # Newest first, in case a setting was changed inside another that was changed too
+    for path in reversed(list(_originals)):
+        target, key = _parent(path)
+        if target is game_module:
+            setattr(target, key, _originals[path])
+        elif _originals[path] is _missing:
+            del target[key]
+        else:
+            target[key] = _originals[path]
+    _originals.clear()
+
+
+def parse_param(text):
+    """Parse NAME=V1,V2,... or NAME=[V1, V2, ...] into (name, [values]); values are read as JSON where they can be"""
+    name, sep, values = text.partition("=")
+    if not sep or not name or not values:
+        raise ValueError(f"expected NAME=VALUES, got {text!r}")
+    if values.lstrip().startswith("["):
+        return name, json.loads(values)
+    return name, [_parse_value(value) for value in values.split(",")]
+
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_seeds(text):
+    """Parse START:STOP (STOP excluded) or a count of seeds starting at 0"""
+    start, sep, stop = text.partition(":")
+    if sep:
+        return range(int(start), int(stop))
+    return range(int(text))
+
+
+# Games
+
+def play(settings, seed, policy_name, max_wave, max_frames, use_numpy):
+    """Play one game with settings applied and return its row of results"""
+    restore_settings()
+    for path, value in settings.items():
+        set_setting(path, value)
+    game_module.derive_settings()
+    start = time.perf_counter()
+    game = headless.run(headless.policies[policy_name], generate_map(seed), use_numpy, max_frames, max_wave,
+                        seed=seed)
+    elapsed = time.perf_counter() - start
+    return {
+        "seed": seed,
+        "wave": game.wave,
+        "waves_cleared": len(game.wave_times),
+        "kills": game.player_kills,
+        "score": game.player_score,
+        "damage_taken": round(game.damage_taken, 2),
+        "died": int(game.over),
+        "ticks": game.frame,
+        "game_seconds": round(game.time / 1000, 2),
+        "wave_seconds": ";".join(f"{ms / 1000:.2f}" for ms in game.wave_times),
+        "elapsed": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless Zombie Survival games over a grid of balance settings")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUES",
+                        help="a game.py setting by dotted path and the values to try (repeatable)")
+    parser.add_argument("--seeds", default="0:20", help="seeds to play each combination with, as START:STOP or a count")
+    parser.add_argument("--policy", choices=sorted(headless.policies), default="bot", help="who plays the games")
+    parser.add_argument("--max-wave", type=int, default=None, help="stop each game once this wave is cleared")
+    parser.add_argument("--frames", type=int, default=60 * 60 * 10, help="stop each game after this many ticks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="games played at once")
+    parser.add_argument("--numpy", action="store_true", help="keep zombies and bullets in NumPy arrays")
+    parser.add_argument("--out", default="sweep.csv", help="CSV file to write a row per game to")
+    args = parser.parse_args()
+
+    grid = {}
+    for text in args.param:
+        try:
+            name, values = parse_param(text)
+            get_setting(name)
+        except ValueError as e:
+            parser.error(f"--param {text}: {e}")
+        except (LookupError, AttributeError):
+            parser.error(f"--param {text}: game.py has no setting {name}")
+        if name in game_module.derived_settings:
+            parser.error(f"--param {text}: {name} is computed from other settings, so sweep those instead")
+        grid[name] = values
+    try:
+        seeds = parse_seeds(args.seeds)
+    except ValueError:
+        parser.error(f"--seeds {args.seeds}: expected START:STOP or a count")
+    if args.numpy and not entity_arrays.available():
+        print("NumPy is not installed, using the list backend")
+
+    combinations = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    games = len(combinations) * len(seeds)
+    print(f"Playing {len(combinations)} combinations x {len(seeds)} seeds = {games} games "
+          f"on {args.workers} workers")
+
+    start = time.perf_counter()
+    ticks = 0
+    with open(args.out, "w", newline="") as f, ProcessPoolExecutor(args.workers) as executor:
+        writer = csv.DictWriter(f, list(grid) + result_columns)
+        writer.writeheader()
+        futures = {executor.submit(play, settings, seed, args.policy, args.max_wave, args.frames, args.numpy): settings
+                   for settings in combinations for seed in seeds}
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            ticks += row["ticks"]
+            writer.writerow({**{name: json.dumps(value) for name, value in futures[future].items()}, **row})
+            f.flush()
+            if done % max(1, games // 20) == 0 or done == games:
+                print(f"  {done}/{games} games")
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.out}: {games} games in {elapsed:.1f}s, {games / elapsed:.2f} games/s, "
+          f"{ticks / elapsed:.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import math
+
+import pygame
+
+terrain_colors = {
+    0: (50, 100, 50),  # Grass
+    1: (100, 80, 50),  # Dirt
+    2: (200, 180, 140)  # Sand
+}
+
+
+def draw_object(surface, obj_type, x, y):
+    """Draw a tree, rock or bush centered at (x, y)"""
+    if obj_type == "tree":
+        pygame.draw.circle(surface, (30, 80, 30), (x, y), 20)
+        pygame.draw.rect(surface, (80, 50, 20), (x - 5, y + 10, 10, 20))
+    elif obj_type == "rock":
+        pygame.draw.circle(surface, (100, 100, 100), (x, y), 15)
+    elif obj_type == "bush":
+        pygame.draw.circle(surface, (50, 100, 50), (x, y), 10)
+
+
+class TerrainChunks:
+    """Terrain and static map objects baked into cached square chunk surfaces.
+
+    Chunks are rendered the first time the camera sees them and dropped again
+    once they are more than keep_margin chunks outside the view.
+    """
+
+    def __init__(self, get_tile, tile_size, chunk_size=400, keep_margin=2, background=(30, 30, 30)):
+        self.get_tile = get_tile
+        self.tile_size = tile_size
+        self.chunk_size = chunk_size
+        self.keep_margin = keep_margin
+        self.background = background
+        self.chunks = {}
+
+    def _render(self, cx, cy):
+        """Bake one chunk, or return None if no tile touches it"""
+        size = self.chunk_size
+        tile_size = self.tile_size
+        left = cx * size
+        top = cy * size
+
+        # Objects can hang over the edge of their tile, so include the tile
+        # before each chunk edge. Tiles are drawn in the same x-then-y order
+        # as a full-map pass so overlaps resolve the same way.
+        first_x = (left // tile_size - 1) * tile_size
+        first_y = (top // tile_size - 1) * tile_size
+        surface = None
+        for x in range(first_x, left + size, tile_size):
+            for y in range(first_y, top + size, tile_size):
+                tile_info = self.get_tile(x, y)
+                if tile_info is None:
+                    continue
+                if surface is None:
+                    surface = pygame.Surface((size, size))
+                    if pygame.display.get_surface() is not None:
+                        surface = surface.convert()
+                    surface.fill(self.background)
+
+                tx = x - left
+                ty = y - top
+                pygame.draw.rect(surface, terrain_colors.get(tile_info["type"], terrain_colors[2]),
+                                 (tx, ty, tile_size, tile_size))
+                for obj in tile_info["objects"]:
+                    draw_object(surface, obj["type"], int(obj["x"]) - left, int(obj["y"]) - top)
+        return surface
+
+    def visible_range(self, camera_x, camera_y, width, height):
+        """Return the (first, last) chunk columns and rows overlapping the view"""
+        size = self.chunk_size
+        return (math.floor(camera_x / size), math.floor((camera_x + width - 1) / size),
+                math.floor(camera_y / size), math.floor((camera_y + height - 1) / size))
+
+    def draw(self, surface, camera_x, camera_y):
+        """Blit every chunk overlapping the view and evict far away chunks"""
+        width, height = surface.get_size()
+        first_cx, last_cx, first_cy, last_cy = self.visible_range(camera_x, camera_y, width, height)
+
+        blits = []
+        for cx in range(first_cx, last_cx + 1):
+            for cy in range(first_cy, last_cy + 1):
+                key = (cx, cy)
+                if key not in self.chunks:
+                    self.chunks[key] = self._render(cx, cy)
+                chunk = self.chunks[key]
+                if chunk is not None:
+                    blits.append((chunk, (cx * self.chunk_size - camera_x, cy * self.chunk_size - camera_y)))
+        surface.blits(blits, doreturn=False)
+
+        self.evict(first_cx - self.keep_margin, last_cx + self.keep_margin,
+                   first_cy - self.keep_margin, last_cy + self.keep_margin)
+
+    def evict(self, first_cx, last_cx, first_cy, last_cy):
+        """Drop chunks outside the given range of columns and rows"""
+        far = [key for key in self.chunks
+               if not (first_cx <= key[0] <= last_cx and first_cy <= key[1] <= last_cy)]
+        for key in far:
+            del self.chunks[key]
@@ -0,0 +1,57 @@
+"""Per-phase frame timing.
+
+Code being timed calls lap(name) at the end of each phase, which charges the
+time since the previous lap to that name. Game and Renderer hold null_timer
+by default, whose lap() does nothing.
+"""
+import math
+import time
+
+
+class PhaseTimer:
+    """Splits each frame into named phases by wall-clock time"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.phases = {}  # name -> seconds spent in the current frame
+        self.last = clock()
+
+    def start(self):
+        """Begin a new frame"""
+        self.phases = {}
+        self.last = self.clock()
+
+    def lap(self, name):
+        """Charge the time since the last lap to a phase"""
+        now = self.clock()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self.last
+        self.last = now
+
+    def finish(self):
+        """Return {phase: ms} for the frame just timed"""
+        return {name: seconds * 1000 for name, seconds in self.phases.items()}
+
+
+class NullTimer:
+    """Stands in for a PhaseTimer when nothing is being timed"""
+
+    def start(self):
+        pass
+
+    def lap(self, name):
+        pass
+
+    def finish(self):
+        return {}
+
+
+null_timer = NullTimer()
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of numbers (fraction in 0..1)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
@@ -0,0 +1,54 @@
+"""Endless map, generated chunk by chunk from the world seed.
+
+The world is split into square chunks of chunk_tiles x chunk_tiles tiles.
+A chunk is generated the first time anything asks for one of its tiles,
+from a Random seeded with the world seed and the chunk's coordinates alone,
+so the same seed always gives the same world in whatever order it is
+explored. Only the max_chunks most recently used chunks are kept; an
+evicted chunk is generated again, identically, when it is next needed.
+A World may be shared between threads, such as the simulation thread and
+the renderer baking terrain.
+"""
+import random
+import threading
+from collections import OrderedDict
+
+
+class World:
+    """Lazily generated tiles of an unbounded map"""
+
+    def __init__(self, seed, generate_tile, tile_size, chunk_tiles=8, max_chunks=64):
+        self.seed = seed
+        self.generate_tile = generate_tile  # (rng, x, y) -> tile with its top-left corner at (x, y)
+        self.tile_size = tile_size
+        self.chunk_tiles = chunk_tiles
+        self.chunk_size = tile_size * chunk_tiles
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (cx, cy) -> {(x, y): tile}
+        self.lock = threading.Lock()  # guards chunks, which every lookup reorders
+
+    def chunk(self, cx, cy):
+        """Return the {(x, y): tile} of a chunk, generating it if needed"""
+        key = (cx, cy)
+        with self.lock:
+            tiles = self.chunks.get(key)
+            if tiles is not None:
+                self.chunks.move_to_end(key)
+                return tiles
+
+            rng = random.Random(f"{self.seed}:{cx}:{cy}")
+            tiles = {}
+            left = cx * self.chunk_size
+            top = cy * self.chunk_size
+            for x in range(left, left + self.chunk_size, self.tile_size):
+                for y in range(top, top + self.chunk_size, self.tile_size):
+                    tiles[(x, y)] = self.generate_tile(rng, x, y)
+
+            self.chunks[key] = tiles
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+            return tiles
+
+    def tile(self, x, y):
+        """Return the tile whose top-left corner is at (x, y), a multiple of tile_size"""
+        return self.chunk(x // self.chunk_size, y // self.chunk_size)[(x, y)]